@@ -1,4 +1,30 @@
 __version__ = '0.0.7'
 
-from .component import Component
-from .project import Project, find_resources
+__all__ = ['Component', 'Project', 'find_resources']
+
+from typing import TYPE_CHECKING
+from importlib import import_module
+
+if TYPE_CHECKING:
+    from .component import Component
+    from .project import Project, find_resources
+
+
+LAZY_ATTRIBUTES = {
+    'Component': '.component',
+    'Project': '.project',
+    'find_resources': '.project',
+}
+
+
+def __getattr__(name):
+    """Import the public api on first access to keep the package import cheap."""
+    if name not in LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *LAZY_ATTRIBUTES])
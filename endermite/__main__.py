@@ -1,5 +1,6 @@
 from .cli import ender
 
 
-# pylint: disable = unexpected-keyword-arg
-ender(prog_name='ender')
+if __name__ == '__main__':
+    # pylint: disable = unexpected-keyword-arg
+    ender(prog_name='ender')
@@ -0,0 +1,253 @@
+__all__ = ['RuntimeCost', 'RuntimeCostAnalysis', 'call_graph', 'recursive_functions']
+
+from dataclasses import dataclass
+from collections import defaultdict
+
+from .component import ComponentBuilder
+from .component_method import ComponentMethodBuilder
+from .function import FunctionBuilder, FunctionTagBuilder
+
+
+@dataclass
+class RuntimeCost:
+    """Estimated cost of running a function once.
+
+    The estimate assumes that every conditional command succeeds.
+    Commands that run as the entities selected with `@e` contribute to
+    the per-entity cost, which gets multiplied by the number of matching
+    entities in game.
+    """
+
+    commands: int = 0
+    selector_scans: int = 0
+    entity_commands: int = 0
+    entity_selector_scans: int = 0
+    depth: int = 0
+    recursive: bool = False
+
+    def add(self, other, per_entity=False):
+        """Add the cost of a function invoked from the current one."""
+        if per_entity:
+            self.entity_commands += other.commands + other.entity_commands
+            self.entity_selector_scans += other.selector_scans + other.entity_selector_scans
+        else:
+            self.commands += other.commands
+            self.selector_scans += other.selector_scans
+            self.entity_commands += other.entity_commands
+            self.entity_selector_scans += other.entity_selector_scans
+        self.depth = max(self.depth, other.depth)
+        self.recursive = self.recursive or other.recursive
+
+    @property
+    def sort_key(self):
+        return (self.selector_scans + self.entity_selector_scans,
+                self.entity_commands, self.commands, self.depth)
+
+
+@dataclass
+class RuntimeCostEntry:
+    kind: str
+    component: str
+    name: str
+    cost: RuntimeCost
+
+
+class RuntimeCostAnalysis:
+    """Estimate the per-tick cost of the functions of a built project."""
+
+    def __init__(self):
+        self.functions = {}
+        self.tags = defaultdict(list)
+        self.entries = []
+        self.tick = RuntimeCost()
+        self._costs = {}
+
+    def analyze(self, project_builder):
+        """Collect the functions of the project and estimate their cost."""
+        self.collect(project_builder)
+
+        for component_builder in project_builder:
+            if isinstance(component_builder, ComponentBuilder):
+                self.analyze_component(component_builder)
+
+        self.tick = self.tag_cost('minecraft:tick', set())
+        self.entries.sort(key=lambda entry: entry.cost.sort_key, reverse=True)
+
+    def collect(self, builder):
+        """Gather the commands of every function and the values of every tag."""
+        if isinstance(builder, FunctionBuilder):
+            self.functions[builder.name] = [str(command) for command in builder.resource]
+        elif isinstance(builder, FunctionTagBuilder):
+            self.tags[builder.name].extend(map(str, builder.resource))
+
+        for child in builder:
+            self.collect(child)
+
+    def analyze_component(self, component_builder):
+        component = component_builder.name
+        tick_cost = RuntimeCost()
+        tick_name = 'minecraft:tick'
+
+        for builder in component_builder:
+            if isinstance(builder, ComponentMethodBuilder):
+                cost = self.function_cost(builder.resource.function_name, set())
+                self.entries.append(RuntimeCostEntry('method', component, builder.name, cost))
+            elif isinstance(builder, FunctionTagBuilder) and builder.name == 'minecraft:tick':
+                for function_name in builder.resource:
+                    tick_cost.add(self.function_cost(str(function_name), set()))
+
+        if component_builder.uses_tick_dispatcher:
+            tick_name = component_builder.tick_dispatcher.function
+            tick_cost.add(self.dispatched_cost(component_builder), per_entity=True)
+
+        self.entries.append(RuntimeCostEntry('tick', component, tick_name, tick_cost))
+
+    def dispatched_cost(self, component_builder):
+        """Return the cost of the tick callbacks the dispatcher invokes for each entity.
+
+        With the shared tick dispatch, components don't have their own
+        tick function. The dispatcher checks the tag of every component
+        for each entity it runs as, and invokes the tick callbacks of the
+        components the entity has.
+        """
+        cost = RuntimeCost()
+        for _, callback in component_builder.dispatched_tick_callbacks:
+            cost.commands += 1
+            cost.add(self.tag_cost(callback, set()))
+        return cost
+
+    def function_cost(self, function_name, visiting):
+        """Return the estimated cost of invoking a function."""
+        if function_name in self._costs:
+            return self._costs[function_name]
+
+        if function_name in visiting:
+            return RuntimeCost(recursive=True)
+
+        visiting.add(function_name)
+        cost = RuntimeCost()
+
+        for command in self.functions.get(function_name, []):
+            cost.commands += 1
+            cost.selector_scans += command.count('@e')
+
+            callee = parse_function_call(command)
+            if callee:
+                if callee.startswith('#'):
+                    callee_cost = self.tag_cost(callee[1:], visiting)
+                else:
+                    callee_cost = self.function_cost(callee, visiting)
+                cost.add(callee_cost, per_entity=runs_as_entities(command))
+
+        cost.depth += 1
+        visiting.discard(function_name)
+
+        if not cost.recursive:
+            self._costs[function_name] = cost
+        return cost
+
+    def tag_cost(self, tag_name, visiting):
+        """Return the estimated cost of invoking a function tag."""
+        cost = RuntimeCost()
+        for value in self.tags.get(tag_name, []):
+            if value.startswith('#'):
+                cost.add(self.tag_cost(value[1:], visiting))
+            else:
+                cost.add(self.function_cost(value, visiting))
+        return cost
+
+
+def parse_function_call(command):
+    """Return the function invoked by a command, if any."""
+    tokens = command.split(' ')
+    if len(tokens) >= 2 and tokens[-2] == 'function':
+        if len(tokens) == 2 or tokens[-3] == 'run':
+            return tokens[-1]
+    return None
+
+
+def runs_as_entities(command):
+    """Check if the command runs as the entities selected with `@e`."""
+    tokens = command.split(' ')
+    if tokens[0] != 'execute':
+        return False
+    return any(token == 'as' and selector.startswith('@e')
+               for token, selector in zip(tokens, tokens[1:]))
+
+
+def call_graph(builder, graph=None):
+    """Map every function and function tag of the tree to what it invokes.
+
+    Function tags are prefixed with `#` so that they don't collide with
+    functions of the same name.
+    """
+    if graph is None:
+        graph = defaultdict(set)
+
+    if isinstance(builder, FunctionBuilder):
+        calls = (parse_function_call(str(command)) for command in builder.resource)
+        graph[builder.name].update(filter(None, calls))
+    elif isinstance(builder, FunctionTagBuilder):
+        graph['#' + builder.name].update(str(value) for value in builder.resource)
+
+    for child in builder:
+        call_graph(child, graph)
+
+    return graph
+
+
+def recursive_functions(graph):
+    """Return the nodes of the call graph that can end up invoking themselves.
+
+    The function computes the strongly connected components of the graph
+    with an iterative version of Tarjan's algorithm.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    recursive = set()
+
+    for root in list(graph):
+        if root in index:
+            continue
+
+        work = [(root, iter(graph.get(root, ())))]
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, callees = work[-1]
+            for callee in callees:
+                if callee not in index:
+                    index[callee] = lowlink[callee] = len(index)
+                    stack.append(callee)
+                    on_stack.add(callee)
+                    work.append((callee, iter(graph.get(callee, ()))))
+                    break
+                if callee in on_stack:
+                    lowlink[node] = min(lowlink[node], index[callee])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = pop_component(stack, on_stack, node)
+                    if len(component) > 1 or node in graph.get(node, ()):
+                        recursive.update(component)
+
+    return recursive
+
+
+def pop_component(stack, on_stack, root):
+    """Pop the strongly connected component of the given root off the stack."""
+    component = []
+    while True:
+        member = stack.pop()
+        on_stack.discard(member)
+        component.append(member)
+        if member == root:
+            return component
@@ -0,0 +1,156 @@
+__all__ = ['BuildCache', 'CacheEntry', 'source_modules']
+
+import sys
+import json
+from hashlib import sha1
+from pathlib import Path
+from inspect import ismodule
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List
+
+from . import __version__
+from .utils import parse_imports
+
+
+@dataclass
+class CacheEntry:
+    """Record of the resources built for a component.
+
+    Functions are stored along with a flag telling if they're generated
+    functions, because the name of generated functions needs to be
+    registered again when the entry is restored. The methods map the name
+    of each method to its body and to the function of another component
+    it shares the body with, if any.
+    """
+
+    key: str
+    functions: List[list] = field(default_factory=list)
+    function_tags: List[list] = field(default_factory=list)
+    methods: Dict[str, list] = field(default_factory=dict)
+
+    def add_function(self, name, commands, generated):
+        function = [name, list(map(str, commands)), generated]
+        self.functions.append(function) # pylint: disable = no-member
+
+    def add_function_tag(self, name, values):
+        self.function_tags.append([name, list(values)]) # pylint: disable = no-member
+
+
+class BuildCache:
+    """Persist the resources built for each component between builds.
+
+    Entries are keyed by a digest of the project options, the endermite
+    version and the source of the modules that can affect the output of
+    the component. Only the entries used during the current build are
+    saved, so components that don't exist anymore are dropped.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.used = {}
+        self.restored = 0
+        self.file_digests = {}
+        self.module_imports = {}
+
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            pass
+
+    def component_key(self, project, component):
+        """Return the key of the cache entry of a component."""
+        digest = sha1('\0'.join([
+            __version__,
+            project.name,
+            project.tick_dispatch,
+            project.method_guard,
+            str(project.flatten_execute),
+            str(project.stagger_ticks),
+            component.__module__,
+            component.__qualname__,
+        ]).encode())
+
+        modules = source_modules(component, self.module_imports)
+        for filename in sorted(module.__file__ for module in modules):
+            digest.update(f'\0{filename}\0{self.file_digest(filename)}'.encode())
+
+        return digest.hexdigest()
+
+    def file_digest(self, filename):
+        if filename not in self.file_digests:
+            try:
+                self.file_digests[filename] = sha1(Path(filename).read_bytes()).hexdigest()
+            except OSError:
+                self.file_digests[filename] = ''
+        return self.file_digests[filename]
+
+    def get(self, name, key):
+        """Return the entry of a component if it's still valid."""
+        entry = self.entries.get(name)
+        if entry and entry.get('key') == key:
+            try:
+                return CacheEntry(**entry)
+            except TypeError:
+                pass
+        return None
+
+    def set(self, name, entry, restored=False):
+        """Keep the entry of a component for the next build."""
+        self.used[name] = entry
+        if restored:
+            self.restored += 1
+
+    def save(self):
+        """Write the entries used during the build to the cache file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        entries = {name: asdict(entry) for name, entry in self.used.items()}
+        self.path.write_text(json.dumps(entries))
+
+
+def source_modules(component, module_imports=None):
+    """Return the modules whose source can affect the output of a component.
+
+    This includes the modules that define the component and its base
+    classes, as well as every module reachable from them that lives in
+    the same source directory, which usually contain helpers, constants
+    and other components. Modules are followed through the objects they
+    refer to and through their import statements until no new module is
+    found. The optional dictionary caches the imports of each module.
+    """
+    if module_imports is None:
+        module_imports = {}
+
+    modules = {sys.modules.get(cls.__module__) for cls in component.__mro__}
+    modules = {module for module in modules if getattr(module, '__file__', None)}
+    roots = {module_root(module) for module in modules
+             if module.__name__.partition('.')[0] != 'endermite'}
+
+    pending = list(modules)
+    while pending:
+        module = pending.pop()
+        if module.__name__ not in module_imports:
+            module_imports[module.__name__] = parse_imports(module.__file__, module.__package__)
+
+        candidates = [sys.modules.get(name) for name in module_imports[module.__name__]]
+        for value in list(vars(module).values()):
+            if not ismodule(value):
+                module_name = getattr(value, '__module__', None)
+                value = sys.modules.get(module_name) if isinstance(module_name, str) else None
+            candidates.append(value)
+
+        for value in candidates:
+            filename = getattr(value, '__file__', None)
+            if (filename and value not in modules
+                    and any(root in Path(filename).parents for root in roots)):
+                modules.add(value)
+                pending.append(value)
+
+    return modules
+
+
+def module_root(module):
+    """Return the directory containing the top-level package of a module."""
+    package = sys.modules.get(module.__name__.partition('.')[0], module)
+    path = Path(getattr(package, '__file__', None) or module.__file__)
+    return path.parent.parent if path.name == '__init__.py' else path.parent
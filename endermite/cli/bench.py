@@ -0,0 +1,245 @@
+import sys
+import json
+import shutil
+import time
+import statistics
+import tracemalloc
+from pathlib import Path
+from textwrap import indent
+from importlib import import_module
+from tempfile import TemporaryDirectory
+from typing import NamedTuple
+import click
+
+from endermite.resource import clear_registries
+from endermite.utils import discard_modules
+from endermite.output import data_pack_files, dump_data_pack
+
+from .utils import display_version, display_error
+
+
+BENCH_PROJECT_NAME = 'endermite_bench'
+
+
+class BenchConfig(NamedTuple):
+    """Shape of the synthetic project being built."""
+
+    components: int = 50
+    methods: int = 5
+    depth: int = 2
+    nesting: int = 3
+
+
+class BenchResult(NamedTuple):
+    """Measurements taken while building the synthetic project."""
+
+    import_time: float
+    build_time: float
+    dump_time: float
+    peak_memory: int
+    files: int
+    bytes: int
+    commands: int
+
+
+DEFAULT_CONFIG = BenchConfig()
+
+
+@click.command()
+@click.option('--components', type=click.IntRange(min=1), default=DEFAULT_CONFIG.components,
+              help='Number of components in the synthetic project.')
+@click.option('--methods', type=click.IntRange(min=1), default=DEFAULT_CONFIG.methods,
+              help='Number of methods defined by each component class.')
+@click.option('--depth', type=click.IntRange(min=0), default=DEFAULT_CONFIG.depth,
+              help='Number of abstract base classes of each component.')
+@click.option('--nesting', type=click.IntRange(min=0), default=DEFAULT_CONFIG.nesting,
+              help='Number of nested execute blocks in each method.')
+@click.option('--repeat', type=click.IntRange(min=1), default=5,
+              help='Number of timed builds.')
+@click.option('--save', type=click.Path(dir_okay=False),
+              help='Save the results as a baseline in the given file.')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False),
+              help='Compare the results with a saved baseline.')
+@click.option('--tolerance', type=click.FloatRange(min=0), default=0.1,
+              help='Allowed relative slowdown before reporting a regression.')
+def bench(repeat, save, compare, tolerance, **config):
+    """Measure the build performance on a synthetic project."""
+    display_version()
+    config = BenchConfig(**config)
+
+    baseline = None
+    if compare:
+        baseline = json.loads(Path(compare).read_text())
+        if baseline['config'] != config._asdict():
+            display_error('The baseline was recorded with a different configuration.')
+            sys.exit(1)
+
+    click.echo(f'\nBenchmarking {config.components} components with {config.methods} methods, '
+               f'{config.depth} base classes and {config.nesting} nested execute blocks.')
+
+    result = run_benchmark(config, repeat)
+    display_result(result, baseline and baseline['result'])
+
+    if save:
+        Path(save).write_text(json.dumps({
+            'config': config._asdict(),
+            'result': result._asdict(),
+        }, indent=4))
+
+    if baseline and find_regressions(result, baseline['result'], tolerance):
+        display_error('Performance regressed compared to the baseline.')
+        sys.exit(1)
+
+
+def run_benchmark(config, repeat):
+    """Build the synthetic project several times and return the measurements.
+
+    The timings are the medians of the timed builds. The peak memory is
+    measured during a separate build because tracing allocations slows
+    down the build significantly.
+    """
+    with TemporaryDirectory() as directory:
+        source_path = Path(directory) / 'source'
+        output_path = Path(directory) / 'output'
+        generate_project(source_path / BENCH_PROJECT_NAME, config)
+
+        sys.path.insert(0, str(source_path))
+        try:
+            runs = [build_synthetic_project(source_path, output_path) for _ in range(repeat)]
+
+            tracemalloc.start()
+            try:
+                build_synthetic_project(source_path, output_path)
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        finally:
+            sys.path.remove(str(source_path))
+
+    timings, pack = zip(*runs)
+    import_time, build_time, dump_time = map(statistics.median, zip(*timings))
+    files = list(data_pack_files(pack[-1]))
+
+    return BenchResult(
+        import_time=import_time,
+        build_time=build_time,
+        dump_time=dump_time,
+        peak_memory=peak_memory,
+        files=len(files),
+        bytes=sum(len(content) for _, content in files),
+        commands=sum(count_commands(content) for filename, content in files
+                     if filename.endswith('.mcfunction')),
+    )
+
+
+def build_synthetic_project(source_path, output_path):
+    """Import, build and dump the synthetic project from scratch.
+
+    The output directory is removed beforehand, otherwise the data pack
+    writer would skip the unchanged files of the previous run.
+    """
+    shutil.rmtree(output_path, ignore_errors=True)
+
+    try:
+        start_time = time.perf_counter()
+        project = getattr(import_module(BENCH_PROJECT_NAME), BENCH_PROJECT_NAME)
+        import_time = time.perf_counter()
+        pack = project.build()
+        build_time = time.perf_counter()
+        dump_data_pack(pack, output_path)
+        dump_time = time.perf_counter()
+    finally:
+        discard_modules(source_path)
+        clear_registries(BENCH_PROJECT_NAME)
+
+    timings = (import_time - start_time, build_time - import_time, dump_time - build_time)
+    return timings, pack
+
+
+def count_commands(content):
+    """Return the number of commands in the content of a function file."""
+    return sum(1 for line in content.decode().splitlines()
+               if line and not line.startswith('#'))
+
+
+def generate_project(path, config):
+    """Write the source code of a synthetic project in the given directory."""
+    path.mkdir(parents=True)
+    (path / '__init__.py').write_text(
+        'from endermite import Project, find_resources\n\n'
+        f'{BENCH_PROJECT_NAME} = Project(name={BENCH_PROJECT_NAME!r}, '
+        '**find_resources(__name__))\n'
+    )
+
+    for index in range(config.components):
+        (path / f'component_{index:04}.py').write_text(generate_component(index, config))
+
+
+def generate_component(index, config):
+    """Return the source code of a component and its chain of base classes."""
+    lines = [
+        'from endermite import Component',
+        'from endermite.decorators import public, tick',
+    ]
+    base = 'Component'
+
+    for level in range(config.depth + 1):
+        concrete = level == config.depth
+        name = f'Component{index:04}' + ('' if concrete else f'Base{level}')
+        arguments = base if concrete else f'{base}, abstract=True'
+        lines += ['', '', f'class {name}({arguments}):']
+
+        for method in range(config.methods):
+            source = generate_method(level, method, config, concrete and method == 0)
+            lines += [''] + indent(source, '    ').splitlines()
+
+        base = name
+
+    return '\n'.join(lines) + '\n'
+
+
+def generate_method(level, method, config, tick_method):
+    """Return the source code of a method with nested execute blocks."""
+    lines = ['@tick'] if tick_method else []
+    lines += ['@public', f'def method_{level}_{method}(self):']
+    body = [
+        f'self.say("method {level} {method}")',
+        f'self.add_tag("bench.{level}.{method}")',
+    ]
+    if method:
+        body.append(f'self.method_{level}_{method - 1}()')
+
+    for depth in reversed(range(config.nesting)):
+        body = [f"with self.execute(('as', '@e[tag=bench.{depth}]'), ('at', '@s')):"] \
+            + [f'    {line}' for line in body]
+
+    return '\n'.join(lines + [f'    {line}' for line in body]) + '\n'
+
+
+def display_result(result, baseline=None):
+    """Display the measurements and the difference with the baseline."""
+    click.echo()
+
+    rows = [
+        ('import', f'{result.import_time * 1000:.2f}ms', 'import_time'),
+        ('build', f'{result.build_time * 1000:.2f}ms', 'build_time'),
+        ('dump', f'{result.dump_time * 1000:.2f}ms', 'dump_time'),
+        ('peak memory', f'{result.peak_memory / 1024:.1f}KiB', 'peak_memory'),
+        ('files', str(result.files), 'files'),
+        ('bytes', str(result.bytes), 'bytes'),
+        ('commands', str(result.commands), 'commands'),
+    ]
+
+    for label, value, key in rows:
+        line = f'{label:>12} {value:>12}'
+        if baseline and baseline[key]:
+            change = getattr(result, key) / baseline[key] - 1
+            color = 'red' if change > 0 else 'green' if change < 0 else None
+            line += click.style(f' {change:+8.1%}', fg=color)
+        click.echo(line)
+
+
+def find_regressions(result, baseline, tolerance):
+    """Return the measurements that got worse than the baseline allows."""
+    return [key for key in ('import_time', 'build_time', 'dump_time', 'peak_memory')
+            if getattr(result, key) > baseline[key] * (1 + tolerance)]
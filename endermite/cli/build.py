@@ -1,83 +1,236 @@
 import sys
 import time
+import json
+from pathlib import Path
+from typing import NamedTuple, Optional
 from importlib import import_module
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import click
 
-from endermite import Project
+from endermite.project import Project, BuildPasses
 from endermite.resource import clear_registries
 from endermite.error import BuildError, crop_traceback_until, print_exc, build_guard
-from endermite.utils import delete_cache
+from endermite.utils import delete_cache, discard_modules
+from endermite.output import DataPackSink, dump_data_pack, open_writer
+from endermite.profiler import BuildProfiler, profile_phase
+from endermite.analysis import RuntimeCostAnalysis
+from endermite.cache import BuildCache
 
 from .watch import watch_directory
-from .utils import display_version, display_error, load_level_data, public_modules
-from .config import ENDERMITE_FOLDER_PATH, DATAPACKS_FOLDER_PATH
+from .graph import DependencyGraph
+from .utils import (
+    display_version,
+    display_error,
+    load_world_paths,
+    public_modules,
+    capture_output,
+    replay_output,
+)
+from .config import BUILD_CACHE_FOLDER_PATH
+
+
+class BuildOptions(NamedTuple):
+    """Options that affect how projects get built."""
+
+    profile: bool = False
+    profile_output: Optional[Path] = None
+    analyze: bool = False
+    stream: bool = False
+    zip: bool = False
+    cache: bool = True
+    instrument: bool = False
+
+
+def build_options(command):
+    """Add the options that control how the projects get built to a command."""
+    options = [
+        click.option('--profile', is_flag=True,
+                     help='Display the time spent building each component.'),
+        click.option('--profile-output', type=click.Path(file_okay=False),
+                     help='Write the profiling reports as json in the given directory.'),
+        click.option('--analyze', is_flag=True,
+                     help='Estimate the runtime cost of the generated functions.'),
+        click.option('--stream', is_flag=True,
+                     help='Write the functions as soon as they are built to reduce memory usage.'),
+        click.option('--zip', 'zipped', is_flag=True,
+                     help='Output the data packs as zip archives.'),
+        click.option('--no-cache', is_flag=True,
+                     help='Build every component instead of restoring the unchanged ones.'),
+        click.option('--instrument', is_flag=True,
+                     help='Count the invocations of every function to profile the data pack '
+                          'in game.'),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def create_build_options(options):
+    """Return the build options matching the values of the command-line options."""
+    profile_output = options['profile_output']
+    return BuildOptions(
+        profile=options['profile'] or profile_output is not None,
+        profile_output=profile_output and Path(profile_output).absolute(),
+        analyze=options['analyze'],
+        stream=options['stream'],
+        zip=options['zipped'],
+        cache=not options['no_cache'],
+        instrument=options['instrument'],
+    )
 
 
 @click.command()
 @click.option('--watch', is_flag=True, help='Rebuild on file changes.')
-def build(watch):
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1,
+              help='Build the projects in parallel using N worker processes.')
+@build_options
+def build(watch, jobs, **options):
     """Build all the projects of the current world."""
     display_version()
     click.echo('\nBuilding endermite projects.')
 
-    if not load_level_data():
+    paths = load_world_paths()
+    if paths is None:
         sys.exit(1)
+    source_path, output_path = paths
 
-    source_path = ENDERMITE_FOLDER_PATH.absolute()
-    output_path = DATAPACKS_FOLDER_PATH.absolute()
+    sys.path.append(str(source_path))
+    options = create_build_options(options)
 
-    if not source_path.is_dir():
-        display_error('The "@endermite" directory does not exist.')
-        sys.exit(1)
+    with create_pool(jobs, source_path) as pool:
+        if watch:
+            watch_projects(source_path, output_path, options, pool)
+        else:
+            module_paths = public_modules(source_path)
+            results = list(build_projects(module_paths, output_path, options, pool))
+            if not all(success for _, success in results):
+                sys.exit(1)
 
-    sys.path.append(str(source_path))
 
-    if watch:
-        formatted_dir = click.style(str(source_path), fg='blue', bold=True)
-        click.echo(f'\nWatching directory {formatted_dir}.')
+def watch_projects(source_path, output_path, options, pool=None):
+    """Rebuild the projects affected by the changes made to the source directory."""
+    formatted_dir = click.style(str(source_path), fg='blue', bold=True)
+    click.echo(f'\nWatching directory {formatted_dir}.')
+
+    graph = DependencyGraph(source_path)
+    pending = set()
+
+    try:
+        for changes in watch_directory(source_path):
+            count = len(changes)
+            if count == 1:
+                text = changes[0].format(source_path)
+            else:
+                text = f'{count} changes detected'
+
+            change_time = click.style(time.strftime('%H:%M:%S'), fg='blue', bold=True)
+
+            click.echo(f'\n{change_time} {text}')
+
+            pending |= invalidate_packages(graph, (change.path for change in changes))
 
+            module_paths = [module_path for module_path in public_modules(source_path)
+                            if module_path.stem in pending]
+            results = build_projects(module_paths, output_path, options, pool,
+                                     keep_modules=True)
+
+            for module_path, success in results:
+                if success:
+                    pending.discard(module_path.stem)
+    except KeyboardInterrupt:
+        click.secho('\nExit.', fg='blue', bold=True)
+
+
+def invalidate_packages(graph, filepaths):
+    """Discard the packages affected by the changes and return their names."""
+    stale = graph.invalidate(filepaths)
+    for package in stale:
+        delete_cache(package)
+    clear_registries(*stale)
+    return stale
+
+
+def create_pool(jobs, source_path):
+    """Return a process pool if the projects should be built in parallel."""
+    if jobs == 1:
+        return nullcontext()
+    return ProcessPoolExecutor(jobs, initializer=init_worker,
+                               initargs=(str(source_path),))
+
+
+def init_worker(source_path):
+    sys.path.append(source_path)
+
+
+def build_projects(module_paths, output_path, options, pool=None, keep_modules=False):
+    """Build projects and yield their path along with the build status.
+
+    Without a process pool, the projects are built one after the other
+    and the first failure interrupts the build. Otherwise, the projects
+    are all built in the pool and their output is displayed as soon as
+    they complete.
+    """
+    if pool is None:
+        for module_path in module_paths:
+            success = build_project(module_path, output_path, options, keep_modules)
+            yield module_path, success
+            if not success:
+                return
+        return
+
+    futures = {
+        pool.submit(build_project_in_worker, module_path, output_path, options): module_path
+        for module_path in module_paths
+    }
+
+    for future in as_completed(futures):
         try:
-            for changes in watch_directory(source_path):
-                count = len(changes)
-                if count == 1:
-                    text = changes[0].format(source_path)
-                else:
-                    text = f'{count} changes detected'
-
-                now = time.strftime('%H:%M:%S')
-                change_time = click.style(now, fg='blue', bold=True)
-
-                click.echo(f'\n{change_time} {text}')
-
-                for module_path in public_modules(source_path):
-                    if not build_project(module_path, output_path):
-                        break
-        except KeyboardInterrupt:
-            click.secho('\nExit.', fg='blue', bold=True)
-    else:
-        for module_path in public_modules(source_path):
-            if not build_project(module_path, output_path):
-                sys.exit(1)
+            success, output = future.result()
+        except Exception as exc: # pylint: disable = broad-except
+            display_error(f'Worker process for "{futures[future].stem}" '
+                          'crashed, traceback below.')
+            click.echo()
+            print_exc(exc)
+            success = False
+        else:
+            replay_output(output)
+        yield futures[future], success
+
 
+def build_project_in_worker(module_path, output_path, options):
+    """Build a project in a worker process and return the captured output."""
+    try:
+        with capture_output() as output:
+            success = build_project(module_path, output_path, options)
+    finally:
+        discard_modules(module_path.parent)
+    return success, output
 
-def build_project(module_path, output_path):
-    """Build a project and dump the data pack in the given directory."""
-    start_time = time.perf_counter()
+
+def build_project(module_path, output_path, options=BuildOptions(), keep_modules=False):
+    """Build a project and dump the data pack in the given directory.
+
+    When `keep_modules` is set, the imported modules and the registered
+    resources are only discarded if the build fails. This lets the watch
+    mode rebuild a project without re-importing the unchanged ones.
+    """
     project_name = module_path.stem
+    project_build = ProjectBuild(project_name, options)
+    success = False
 
     click.echo(f'\nAttempting to build "{project_name}"...')
 
     try:
-        with build_guard(f'module "{project_name}"'):
-            module = import_module(project_name)
-        project = getattr(module, project_name, None)
+        project = project_build.import_project()
 
         if not isinstance(project, Project):
             click.secho(f'Couldn\'t find any "{project_name}" '
                         'Project object.', fg='black', bold=True)
-            return True
+            success = True
+            return success
 
-        project.build().dump(output_path, overwrite=True)
+        writer = project_build.write(project, output_path)
 
     except BuildError as exc:
         display_error(f'Couldn\'t build {exc}, traceback below.')
@@ -85,21 +238,147 @@ def build_project(module_path, output_path):
         exc = exc.__cause__
         crop_traceback_until(exc, module_path)
         print_exc(exc)
-        return False
 
     except Exception as exc: # pylint: disable = broad-except
         display_error('Build failed, traceback below.')
         click.echo()
         print_exc(exc)
-        return False
 
     else:
-        build_time = time.perf_counter() - start_time
+        project_build.display_result(project, writer)
+        success = True
+
+    finally:
+        if not keep_modules:
+            delete_cache(project_name)
+            clear_registries()
+        elif not success:
+            delete_cache(project_name)
+            clear_registries(project_name)
+
+    return success
+
+
+class ProjectBuild:
+    """Hold the state of the build of a single project.
+
+    The profiler, the analysis and the cache are created according to
+    the build options and reported once the data pack is written.
+    """
+
+    def __init__(self, project_name, options):
+        self.project_name = project_name
+        self.options = options
+        self.start_time = time.perf_counter()
+        self.profiler = BuildProfiler() if options.profile else None
+        self.analysis = RuntimeCostAnalysis() if options.analyze else None
+        self.cache = None
+
+    def import_project(self):
+        """Import the module of the project and return the project object, if any."""
+        with build_guard(f'module "{self.project_name}"'), \
+                profile_phase(self.profiler, 'import'):
+            module = import_module(self.project_name)
+        return getattr(module, self.project_name, None)
+
+    def write(self, project, output_path):
+        """Build the project, write the data pack and return the writer."""
+        options = self.options
+        zipped = options.zip or project.zipped
+
+        if options.cache:
+            self.cache = BuildCache(BUILD_CACHE_FOLDER_PATH.absolute()
+                                    / f'{self.project_name}.json')
+
+        passes = BuildPasses(profiler=self.profiler, analysis=self.analysis, cache=self.cache,
+                             instrument=options.instrument)
+
+        if options.stream:
+            with open_writer(output_path, project.name, zipped) as writer:
+                project.build(passes._replace(sink=DataPackSink(writer)))
+        else:
+            pack = project.build(passes)
+
+            with profile_phase(self.profiler, 'dump'):
+                writer = dump_data_pack(pack, output_path, zipped)
+
+        if self.cache:
+            self.cache.save()
+
+        return writer
+
+    def display_result(self, project, writer):
+        """Display the summary of the build and the requested reports."""
+        build_time = time.perf_counter() - self.start_time
         click.secho('Done! ', fg='green', bold=True, nl=False)
-        click.secho(f'(took {build_time:.3f}s)',
+        changes = writer.written + writer.deleted
+        plural = '' if changes == 1 else 's'
+        cached = ''
+        if self.cache and self.cache.restored:
+            restored = self.cache.restored
+            cached = f', {restored} cached component{"" if restored == 1 else "s"}'
+        click.secho(f'(took {build_time:.3f}s, {changes} file{plural} changed{cached})',
                     fg='black', bold=True)
-        return True
 
-    finally:
-        delete_cache(project_name)
-        clear_registries()
+        if self.options.instrument:
+            report = click.style(f'/function {project.name}:profile/report', bold=True)
+            click.echo(f'Run {report} in game to display the most invoked functions.')
+
+        if self.analysis:
+            display_analysis(self.analysis)
+
+        if self.profiler:
+            display_profile(self.profiler)
+            if self.options.profile_output:
+                self.write_profile_report()
+
+    def write_profile_report(self):
+        """Write the profiling data as json in the profile output directory."""
+        profile_output = self.options.profile_output
+        profile_output.mkdir(parents=True, exist_ok=True)
+        report_path = profile_output / f'{self.project_name}.json'
+        report_path.write_text(json.dumps(self.profiler.as_dict(), indent=4))
+
+
+def display_analysis(analysis, limit=10):
+    """Display the estimated runtime cost of the most expensive functions."""
+    tick = analysis.tick
+    click.secho(f'\nEach tick runs {tick.commands} commands and {tick.selector_scans} '
+                f'@e scans, plus {tick.entity_commands} commands and '
+                f'{tick.entity_selector_scans} @e scans per entity.\n', fg='black', bold=True)
+    click.secho(f'{"@e scans":>9} {"commands":>9} {"entity @e":>9} '
+                f'{"entity cmd":>10} {"depth":>5}', fg='black', bold=True)
+
+    for entry in analysis.entries[:limit]:
+        cost = entry.cost
+        recursive = click.style(' (recursive)', fg='red') if cost.recursive else ''
+        click.echo(f'{cost.selector_scans:9} {cost.commands:9} {cost.entity_selector_scans:9} '
+                   f'{cost.entity_commands:10} {cost.depth:5}  '
+                   f'{entry.kind} "{entry.component}" {entry.name}{recursive}')
+
+
+def display_profile(profiler, limit=10):
+    """Display the duration of each phase and the hottest builders."""
+    phases = ', '.join(f'{name} {elapsed:.3f}s' for name, elapsed in profiler.phases.items())
+    click.secho(f'\nPhases: {phases}\n', fg='black', bold=True)
+    click.secho(f'{"time":>10} {"self":>10} {"functions":>9} {"commands":>9}',
+                fg='black', bold=True)
+    display_profile_node(profiler.tree, limit)
+
+
+def display_profile_node(node, limit, depth=0, max_depth=2):
+    """Display a node of the profiling tree and its hottest children."""
+    click.echo(f'{node["time"] * 1000:8.2f}ms {node["self_time"] * 1000:8.2f}ms '
+               f'{node["functions"]:9} {node["commands"]:9}  '
+               + '  ' * depth + f'{node["builder"]} "{node["name"]}"')
+
+    if depth == max_depth:
+        return
+
+    children = node['children']
+    for child in children[:limit]:
+        display_profile_node(child, limit, depth + 1, max_depth)
+
+    if len(children) > limit:
+        click.secho(' ' * 44 + '  ' * (depth + 1) + f'... {len(children) - limit} more',
+                    fg='black', bold=True)
@@ -4,6 +4,8 @@ from pathlib import Path
 MIN_VERSION_ID = 1519
 
 ENDERMITE_FOLDER_PATH = Path('@endermite')
+BUILD_CACHE_FOLDER_PATH = ENDERMITE_FOLDER_PATH / '__pycache__' / 'endermite'
 
 LEVEL_DATA_PATH = Path('level.dat')
 DATAPACKS_FOLDER_PATH = Path('datapacks')
+SERVER_SOCKET_PATH = Path('.ender.sock')
@@ -0,0 +1,53 @@
+from pathlib import Path
+from collections import defaultdict
+
+from endermite.utils import parse_imports
+
+
+class DependencyGraph:
+    """Track the imports between the top-level packages of a directory."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.imports = {}
+
+    def package_name(self, filepath):
+        """Return the name of the top-level package containing a file."""
+        name = Path(filepath).relative_to(self.path).parts[0]
+        return name[:-3] if name.endswith('.py') else name
+
+    def update(self, filepaths):
+        """Update the imports of the given files."""
+        for filepath in filepaths:
+            filepath = Path(filepath)
+            if filepath.suffix == '.py' and filepath.is_file():
+                self.imports[filepath] = {name.partition('.')[0]
+                                          for name in parse_imports(filepath)}
+            else:
+                self.imports.pop(filepath, None)
+
+    def importers(self):
+        """Return a mapping between packages and the packages importing them."""
+        importers = defaultdict(set)
+        for filepath, names in self.imports.items():
+            package = self.package_name(filepath)
+            for name in names - {package}:
+                importers[name].add(package)
+        return importers
+
+    def invalidate(self, filepaths):
+        """Return the packages affected by changes made to the given files."""
+        filepaths = list(filepaths)
+        self.update(filepaths)
+
+        importers = self.importers()
+        stale = set()
+        queue = [self.package_name(filepath) for filepath in filepaths]
+
+        while queue:
+            package = queue.pop()
+            if package not in stale:
+                stale.add(package)
+                queue.extend(importers[package])
+
+        return stale
@@ -3,7 +3,7 @@ from textwrap import dedent
 from keyword import iskeyword
 import click
 
-from endermite import Project
+from endermite.project import Project
 from endermite.utils import underscore
 
 from .utils import display_version, load_level_data, project_already_exists
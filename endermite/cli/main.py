@@ -1,8 +1,48 @@
+from importlib import import_module
 import click
+from click.utils import make_default_short_help
 
 from .utils import display_version
-from .init import init
-from .build import build
+
+
+class LazyGroup(click.Group):
+    """Command group that only imports the subcommands when they're invoked.
+
+    The short help of each subcommand is provided upfront so that
+    displaying the help message doesn't need to import anything.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, _ = self.lazy_commands[cmd_name]
+            command = getattr(import_module(module_name, __package__), cmd_name)
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        names = self.list_commands(ctx)
+        if not names:
+            return
+
+        limit = formatter.width - 6 - max(map(len, names))
+        rows = []
+
+        for name in names:
+            if name in self.lazy_commands:
+                help_text = make_default_short_help(self.lazy_commands[name][1], limit)
+            else:
+                help_text = self.commands[name].get_short_help_str(limit)
+            rows.append((name, help_text))
+
+        with formatter.section('Commands'):
+            formatter.write_dl(rows)
 
 
 def print_version(ctx, _param, value):
@@ -12,12 +52,14 @@ def print_version(ctx, _param, value):
     ctx.exit()
 
 
-@click.group()
+@click.group(cls=LazyGroup, lazy_commands={
+    'init': ('.init', 'Create a new endermite project.'),
+    'build': ('.build', 'Build all the projects of the current world.'),
+    'bench': ('.bench', 'Measure the build performance on a synthetic project.'),
+    'serve': ('.serve', 'Keep the projects of the current world loaded and build them on request.'),
+    'client': ('.serve', 'Ask the build server of the current world to build the projects.'),
+})
 @click.option('--version', is_flag=True, is_eager=True, expose_value=False,
               callback=print_version, help='Show the version and exit.')
 def ender():
     """Command-line utility to manage endermite projects."""
-
-
-ender.add_command(init)
-ender.add_command(build)
@@ -0,0 +1,215 @@
+import sys
+import json
+import time
+import socket
+from pathlib import Path
+import click
+
+from endermite.error import print_exc
+
+from .build import (
+    BuildOptions,
+    build_options,
+    build_projects,
+    create_build_options,
+    invalidate_packages,
+)
+from .watch import create_watcher
+from .graph import DependencyGraph
+from .utils import (
+    display_version,
+    display_error,
+    load_world_paths,
+    public_modules,
+    capture_output,
+    replay_output,
+)
+from .config import SERVER_SOCKET_PATH
+
+
+@click.command()
+def serve():
+    """Keep the projects of the current world loaded and build them on request."""
+    display_version()
+    click.echo('\nStarting endermite build server.')
+
+    if not hasattr(socket, 'AF_UNIX'):
+        display_error('The build server requires unix sockets, which are not '
+                      'available on this platform.')
+        sys.exit(1)
+
+    paths = load_world_paths()
+    if paths is None:
+        sys.exit(1)
+    source_path, output_path = paths
+
+    if server_running():
+        display_error('A build server is already running for this world.')
+        sys.exit(1)
+
+    sys.path.append(str(source_path))
+
+    with BuildServer(source_path, output_path) as server, \
+            socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        if SERVER_SOCKET_PATH.exists():
+            SERVER_SOCKET_PATH.unlink()
+        listener.bind(str(SERVER_SOCKET_PATH))
+        listener.listen()
+
+        formatted_path = click.style(str(SERVER_SOCKET_PATH.absolute()), fg='blue', bold=True)
+        click.echo(f'\nListening on {formatted_path}.')
+
+        try:
+            while True:
+                connection, _ = listener.accept()
+                with connection:
+                    server.handle(connection)
+        except KeyboardInterrupt:
+            click.secho('\nExit.', fg='blue', bold=True)
+        finally:
+            SERVER_SOCKET_PATH.unlink()
+
+
+@click.command()
+@click.argument('projects', nargs=-1)
+@build_options
+def client(projects, **options):
+    """Ask the build server of the current world to build the projects."""
+    options = create_build_options(options)
+    request = {
+        'projects': list(projects),
+        'options': {
+            **options._asdict(),
+            'profile_output': options.profile_output and str(options.profile_output),
+        },
+    }
+
+    try:
+        response = send_request(request)
+        output, success = response['output'], response['success']
+    except OSError:
+        display_error('Couldn\'t connect to the build server. Make sure that '
+                      '"ender serve" is running in the current world folder.')
+        sys.exit(1)
+    except (ValueError, KeyError, TypeError):
+        display_error('The build server sent an invalid response.')
+        sys.exit(1)
+
+    replay_output(output)
+
+    if not success:
+        sys.exit(1)
+
+
+def send_request(request):
+    """Send a request to the build server and return the response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(SERVER_SOCKET_PATH))
+        with connection.makefile('rwb') as stream:
+            stream.write(json.dumps(request).encode() + b'\n')
+            stream.flush()
+            return json.loads(stream.readline())
+
+
+def server_running():
+    """Check if a build server is already listening in the current world."""
+    if not hasattr(socket, 'AF_UNIX') or not SERVER_SOCKET_PATH.exists():
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(str(SERVER_SOCKET_PATH))
+        except OSError:
+            return False
+    return True
+
+
+class BuildServer:
+    """Build projects on request without re-importing the unchanged modules.
+
+    Before each build, the server collects the changes made to the source
+    directory since the previous request and only discards the packages
+    affected by them.
+    """
+
+    def __init__(self, source_path, output_path):
+        self.source_path = source_path
+        self.output_path = output_path
+        self.graph = DependencyGraph(source_path)
+        self.watcher = create_watcher(source_path)
+
+    def handle(self, connection):
+        """Read a build request from the connection and send back the result.
+
+        When the request can't be handled, the error is displayed by the
+        server and also sent to the client along with a failed status.
+        """
+        with connection.makefile('rwb') as stream:
+            try:
+                request = json.loads(stream.readline())
+                options = request['options']
+                options['profile_output'] = (options['profile_output']
+                                             and Path(options['profile_output']))
+                success, output = self.build(request['projects'], BuildOptions(**options))
+            except Exception as exc: # pylint: disable = broad-except
+                request, success = None, False
+                with capture_output() as output:
+                    display_error('Couldn\'t handle build request, traceback below.')
+                    click.echo()
+                    print_exc(exc)
+                replay_output(output)
+
+            try:
+                stream.write(json.dumps({'success': success, 'output': output}).encode() + b'\n')
+                stream.flush()
+            except OSError:
+                display_error('Couldn\'t send the build result to the client.')
+                return
+
+        if request is None:
+            return
+
+        now = click.style(time.strftime('%H:%M:%S'), fg='blue', bold=True)
+        status = click.style('succeeded' if success else 'failed',
+                             fg='green' if success else 'red', bold=True)
+        names = ', '.join(request['projects']) or 'all projects'
+        click.echo(f'\n{now} Build of {names} {status}')
+
+    def build(self, projects, options):
+        """Build the given projects and return the status and the captured output."""
+        self.refresh()
+
+        module_paths = [module_path for module_path in public_modules(self.source_path)
+                        if not projects or module_path.stem in projects]
+        missing = set(projects) - {module_path.stem for module_path in module_paths}
+
+        with capture_output() as output:
+            if missing:
+                display_error(f'Couldn\'t find project "{sorted(missing)[0]}".')
+                return False, output
+
+            results = build_projects(module_paths, self.output_path, options,
+                                     keep_modules=True)
+            success = all([status for _, status in results])
+
+        return success, output
+
+    def refresh(self):
+        """Discard the packages affected by the changes since the last build."""
+        changes = []
+        while True:
+            more_changes = self.watcher.wait_for_changes(0)
+            if not more_changes:
+                break
+            changes += more_changes
+
+        if changes:
+            invalidate_packages(self.graph, (change.path for change in changes))
+
+    def close(self):
+        self.watcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,11 +1,13 @@
+import io
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
 import click
-from nbtlib import nbt
 
 import endermite
 
 from .config import (
     MIN_VERSION_ID,
     ENDERMITE_FOLDER_PATH,
+    DATAPACKS_FOLDER_PATH,
     LEVEL_DATA_PATH,
 )
 
@@ -29,11 +31,49 @@ def display_error(message):
     )
 
 
+# Output utilities
+
+
+class CapturedStream(io.TextIOBase):
+    """Text stream that records what gets written to it in a shared list."""
+
+    def __init__(self, output, err):
+        super().__init__()
+        self.output = output
+        self.err = err
+
+    def write(self, text):
+        if not isinstance(text, str):
+            raise TypeError(f'write() argument must be str, not {type(text).__name__}')
+        self.output.append((self.err, text))
+        return len(text)
+
+    def isatty(self):
+        return True
+
+
+@contextmanager
+def capture_output():
+    """Capture stdout and stderr in a list of `(err, text)` chunks."""
+    output = []
+    with redirect_stdout(CapturedStream(output, False)), \
+            redirect_stderr(CapturedStream(output, True)):
+        yield output
+
+
+def replay_output(output):
+    """Display the chunks recorded by `capture_output`."""
+    for err, text in output:
+        click.echo(text, nl=False, err=err)
+
+
 # File-related utilities
 
 
 def load_level_data():
     """Read the `level.dat` file and return the `Data` compound."""
+    from nbtlib import nbt
+
     try:
         level_data = nbt.load(LEVEL_DATA_PATH, gzipped=True).root['Data']
     except FileNotFoundError:
@@ -54,6 +94,25 @@ def load_level_data():
     return None
 
 
+def load_world_paths():
+    """Return the source and the output directories of the current world.
+
+    The function displays an error and returns `None` when the world or
+    its source directory can't be found.
+    """
+    if not load_level_data():
+        return None
+
+    source_path = ENDERMITE_FOLDER_PATH.absolute()
+    output_path = DATAPACKS_FOLDER_PATH.absolute()
+
+    if not source_path.is_dir():
+        display_error('The "@endermite" directory does not exist.')
+        return None
+
+    return source_path, output_path
+
+
 def project_already_exists(project_name):
     """Check if a project already exists."""
     return ((ENDERMITE_FOLDER_PATH / project_name).is_dir()
@@ -1,5 +1,11 @@
 import os
+import sys
 import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
 from typing import NamedTuple
 
 
@@ -15,14 +21,47 @@ class Change(NamedTuple):
         return f'{self.action.capitalize()} "{path}"'
 
 
-def watch_directory(path, interval=0.4):
-    """Indefinitely yield the changes being made to a given directory."""
-    watcher = DirectoryWatcher(path)
-    while True:
-        changes = watcher.check_directory()
-        if changes:
-            yield changes
-        time.sleep(interval)
+def watch_directory(path, interval=0.4, debounce=0.1):
+    """Indefinitely yield the changes being made to a given directory.
+
+    Changes are accumulated until nothing happens for the duration of the
+    debounce window. This makes sure that editors saving several files
+    in a row only trigger a single rebuild.
+    """
+    with create_watcher(path) as watcher:
+        while True:
+            changes = watcher.wait_for_changes(interval)
+            if not changes:
+                continue
+
+            while True:
+                more_changes = watcher.wait_for_changes(debounce)
+                if not more_changes:
+                    break
+                changes += more_changes
+
+            yield merge_changes(changes)
+
+
+def merge_changes(changes):
+    """Only keep one change per path."""
+    merged = {}
+    for change in changes:
+        previous = merged.get(change.path)
+        if previous and previous.action == 'created' and change.action == 'edited':
+            continue
+        merged[change.path] = change
+    return list(merged.values())
+
+
+def create_watcher(path):
+    """Return a watcher using the most efficient backend available."""
+    for backend in WATCHER_BACKENDS:
+        try:
+            return backend(path)
+        except OSError:
+            continue
+    raise OSError(f'Couldn\'t watch directory "{path}"')
 
 
 class DirectoryWatcher:
@@ -31,6 +70,18 @@ class DirectoryWatcher:
     def __init__(self, path):
         self.path = path
         self.files = {}
+        self.initialized = False
+
+    def wait_for_changes(self, timeout):
+        """Return the list of changes made to the directory after a delay.
+
+        The first call returns immediately and reports all the existing
+        files as created.
+        """
+        if self.initialized:
+            time.sleep(timeout)
+        self.initialized = True
+        return self.check_directory()
 
     def check_directory(self):
         """Return the list of changes made to the directory."""
@@ -58,3 +109,156 @@ class DirectoryWatcher:
                     changes.append(Change('created', entry.path))
                 elif previous != mtime:
                     changes.append(Change('edited', entry.path))
+
+    def close(self):
+        """Release the resources held by the watcher."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher(DirectoryWatcher):
+    """Directory watcher relying on inotify events instead of polling.
+
+    The watcher registers every directory in the watched tree and only
+    stats the files it receives events for. If the event queue
+    overflows, it falls back to traversing the whole directory.
+    """
+
+    mask = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_CREATE | IN_DELETE | IN_ONLYDIR)
+
+    def __init__(self, path):
+        super().__init__(path)
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on linux')
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not supported by the C library')
+
+        self.descriptor = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.descriptor < 0:
+            raise OSError(ctypes.get_errno(), 'Couldn\'t initialize inotify')
+
+        self.directories = {}
+
+        try:
+            self.add_watch(str(self.path))
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, path):
+        """Watch a directory and all its subdirectories."""
+        watch_descriptor = self.libc.inotify_add_watch(self.descriptor, os.fsencode(path),
+                                                       self.mask)
+        if watch_descriptor < 0:
+            raise OSError(ctypes.get_errno(), f'Couldn\'t watch directory "{path}"')
+        self.directories[watch_descriptor] = path
+
+        for entry in os.scandir(path):
+            if entry.is_dir() and entry.name != '__pycache__':
+                self.add_watch(entry.path)
+
+    def wait_for_changes(self, timeout):
+        if not self.initialized:
+            self.initialized = True
+            return self.check_directory()
+
+        readable, _, _ = select.select([self.descriptor], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.descriptor, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changes = []
+        offset = 0
+
+        while offset < len(data):
+            watch_descriptor, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return changes + self.check_directory()
+
+            if mask & IN_IGNORED:
+                self.directories.pop(watch_descriptor, None)
+            elif watch_descriptor in self.directories and name != '__pycache__':
+                path = os.path.join(self.directories[watch_descriptor], name)
+                if mask & IN_ISDIR:
+                    self.handle_directory_event(mask, path, changes)
+                else:
+                    self.handle_file_event(mask, path, changes)
+
+        return changes
+
+    def handle_file_event(self, mask, path, changes):
+        """Update the file state according to an inotify event."""
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            if self.files.pop(path, None) is not None:
+                changes.append(Change('removed', path))
+            return
+
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return
+
+        previous = self.files.get(path)
+        self.files[path] = mtime
+
+        if previous is None:
+            changes.append(Change('created', path))
+        elif previous != mtime:
+            changes.append(Change('edited', path))
+
+    def handle_directory_event(self, mask, path, changes):
+        """Update the watched directories according to an inotify event."""
+        if mask & (IN_DELETE | IN_MOVED_FROM):
+            prefix = path + os.sep
+            for filepath in [filepath for filepath in self.files
+                             if filepath.startswith(prefix)]:
+                del self.files[filepath]
+                changes.append(Change('removed', filepath))
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            new_files = {}
+            try:
+                self.add_watch(path)
+                self.traverse(path, changes, new_files)
+            except OSError:
+                pass
+            self.files.update(new_files)
+
+    def close(self):
+        if self.descriptor >= 0:
+            os.close(self.descriptor)
+            self.descriptor = -1
+
+
+WATCHER_BACKENDS = [InotifyWatcher, DirectoryWatcher]
@@ -1,11 +1,17 @@
 __all__ = ['CommandMixin']
 
+from hashlib import sha1
+from functools import lru_cache
 from contextlib import contextmanager
 
 from ..function import FunctionBuilder
 from .basic import BasicCommandMixin
 
 
+SCORE_MIN = -2**31
+SCORE_MAX = 2**31 - 1
+
+
 class Command(tuple):
     """Hold the different parts of a minecraft command."""
     __slots__ = ()
@@ -16,9 +22,13 @@ class Command(tuple):
 
 class ExecutionContext(tuple):
     def get_prefix(self, ctx):
-        if self is ctx[self.__class__]:
-            return ()
-        return self and ('execute', *sum(self, ()), 'run')
+        if self is ctx[self.__class__] or not self:
+            return ''
+        args = sum(self, ())
+        try:
+            return _cached_execute_prefix(args, tuple(map(type, args)))
+        except TypeError:
+            return _execute_prefix(args)
 
 
 class CommandMixin(BasicCommandMixin):
@@ -36,24 +46,144 @@ class CommandMixin(BasicCommandMixin):
 
     def run(self, *args):
         self.ctx[FunctionBuilder].register_command(
-            Command(self.execution_context.get_prefix(self.ctx) + args)
+            self.execution_context.get_prefix(self.ctx) + str(Command(args))
         )
 
     def execute(self, *clauses):
         return self.__class__(ctx=self.ctx, execution_context=ExecutionContext(clauses))
 
+    def switch(self, score, cases, default=None):
+        """Run the case matching the value of a score.
+
+        The score is a `(holder, objective)` tuple and the cases map values
+        to functions that emit the commands of the case. They receive the
+        instance, like the body of a `with self.execute(...)` block. The
+        default runs when the value doesn't match any case, but not when
+        the score isn't set.
+        """
+        self.switch_ranges(score, {(value, value): body for value, body in cases.items()},
+                           default)
+
+    def switch_ranges(self, score, cases, default=None):
+        """Run the case whose range contains the value of a score.
+
+        The cases map inclusive `(low, high)` ranges to functions, and a
+        bound set to `None` leaves the range open on that side. The score
+        gets copied before the dispatch so cases can modify it. The copy is
+        skipped when the score isn't set, because the operation would
+        otherwise set it to zero. The dispatch goes through a balanced
+        binary tree of generated functions, so only a logarithmic number of
+        commands run regardless of the number of cases. When the instance
+        has an execution context, the whole dispatch moves to a generated
+        function so it runs separately for each selected entity.
+        """
+        holder, objective = score
+        intervals = _switch_intervals(cases, default)
+
+        functions = {}
+        for body in {id(body): body for _, _, body in intervals}.values():
+            with self._generated_function() as builder:
+                body(self)
+            functions[id(body)] = builder.name
+
+        intervals = [(low, high, functions[id(body)]) for low, high, body in intervals]
+        if not intervals:
+            return
+
+        digest = sha1(repr((holder, objective, intervals)).encode()).hexdigest()
+        copy = f'#switch.{digest[:8]}'
+
+        if not self.execution_context.get_prefix(self.ctx):
+            self._switch_dispatch(score, copy, intervals)
+            return
+
+        with self._generated_function() as builder:
+            self._switch_dispatch(score, copy, intervals)
+        self.run('function', builder.name)
+
+    def _switch_dispatch(self, score, copy, intervals):
+        """Copy the score and dispatch the copy to the functions of the intervals.
+
+        The commands need to run one after the other for each entity of
+        the execution context because they all share the same copy.
+        """
+        holder, objective = score
+        self._run_flattened(f'scoreboard players reset {copy} {objective}')
+        self._run_flattened(f'execute if score {holder} {objective} matches {SCORE_MIN}.. '
+                            f'run scoreboard players operation {copy} {objective} = '
+                            f'{holder} {objective}')
+        self._switch_tree(f'{copy} {objective}', intervals)
+
+    def _switch_tree(self, score, intervals):
+        """Dispatch the score to the functions of the intervals with a binary search."""
+        if len(intervals) <= 2:
+            for low, high, function_name in intervals:
+                self._run_flattened(f'execute if score {score} matches '
+                                    f'{_format_range(low, high)} run function {function_name}')
+            return
+
+        middle = len(intervals) // 2
+        for half in intervals[:middle], intervals[middle:]:
+            if len(half) == 1:
+                self._switch_tree(score, half)
+                continue
+
+            with self._generated_function() as builder:
+                self._switch_tree(score, half)
+            self._run_flattened(f'execute if score {score} matches '
+                                f'{_format_range(half[0][0], half[-1][1])} '
+                                f'run function {builder.name}')
+
+    @contextmanager
+    def _generated_function(self):
+        """Build a generated function invoked in the execution context of the instance."""
+        with FunctionBuilder(self.ctx[FunctionBuilder], None, []).current() as builder:
+            previous_context = self.ctx[ExecutionContext]
+            self.ctx[ExecutionContext] = self.execution_context
+            yield builder
+            self.ctx[ExecutionContext] = previous_context
+            builder.build()
+
     @contextmanager
     def _using_execution_context(self):
         parent = self.ctx[FunctionBuilder]
 
-        with FunctionBuilder(parent, next(parent.function_names), []).current() as builder:
+        with FunctionBuilder(parent, None, []).current() as builder:
             previous_context = self.ctx[ExecutionContext]
             self.ctx[ExecutionContext] = self.execution_context
             yield self
             self.ctx[ExecutionContext] = previous_context
-            builder.build()
 
-        self.run('function', builder.name)
+            flatten = parent.project.flatten_execute and self._can_flatten(builder)
+            if not flatten:
+                builder.build()
+
+        if flatten:
+            builder.detach()
+            for command in builder.resource:
+                self._run_flattened(str(command))
+        else:
+            self.run('function', builder.name)
+
+    def _can_flatten(self, builder):
+        """Check if the body can be merged into the current `execute` chain.
+
+        Only bodies with at most one command can be flattened because the
+        conditions of the context would otherwise be evaluated again
+        before each command. Storing the result of the function call
+        isn't equivalent to storing the result of its command either.
+        """
+        if len(builder.resource) > 1:
+            return False
+        return not any(clause[0] == 'store' for clause in self.execution_context)
+
+    def _run_flattened(self, command):
+        prefix = self.execution_context.get_prefix(self.ctx)
+        if prefix and command.startswith('execute '):
+            command = prefix[:-len('run ')] + command[len('execute '):]
+        else:
+            command = prefix + command
+        self.ctx[FunctionBuilder].register_command(command)
 
     def __enter__(self):
         frame = self._using_execution_context()
@@ -63,3 +193,59 @@ class CommandMixin(BasicCommandMixin):
     def __exit__(self, exc_type, exc_val, exc_tb):
         frame = self._stack.pop()
         return frame.__exit__(exc_type, exc_val, exc_tb)
+
+
+def _execute_prefix(args):
+    return f'execute {Command(args)} run '
+
+
+@lru_cache(maxsize=4096)
+def _cached_execute_prefix(args, _types):
+    """Serialize the arguments of the clauses of an execution context.
+
+    Methods create a new context for every `with self.execute(...)` block
+    but keep using the same selectors, so the prefixes are cached by
+    arguments and every command running in the same context shares the
+    resulting string. The types of the arguments are part of the key
+    because values like `1` and `True` are equal but serialized
+    differently. Contexts with unhashable arguments aren't cached.
+    """
+    return _execute_prefix(args)
+
+
+def _switch_intervals(cases, default):
+    """Return the sorted `(low, high, body)` intervals of the cases of a switch.
+
+    The open bounds are replaced with the score limits, and the gaps
+    between the ranges are filled with the default, if any.
+    """
+    intervals = []
+
+    for (low, high), body in sorted(cases.items(), key=_range_key):
+        low = SCORE_MIN if low is None else low
+        high = SCORE_MAX if high is None else high
+        if low > high or intervals and intervals[-1][1] >= low:
+            raise ValueError(f'Invalid or overlapping switch range {low}..{high}')
+        intervals.append((low, high, body))
+
+    if default is not None:
+        bounds = [SCORE_MIN - 1, *(bound for low, high, _ in intervals
+                                   for bound in (low, high)), SCORE_MAX + 1]
+        intervals += [(low + 1, high - 1, default)
+                      for low, high in zip(bounds[::2], bounds[1::2]) if high - low > 1]
+        intervals.sort(key=lambda interval: interval[0])
+
+    return intervals
+
+
+def _range_key(case):
+    low = case[0][0]
+    return SCORE_MIN if low is None else low
+
+
+def _format_range(low, high):
+    if low == high:
+        return str(low)
+    if low == SCORE_MIN and high == SCORE_MAX:
+        return f'{SCORE_MIN}..'
+    return f'{"" if low == SCORE_MIN else low}..{"" if high == SCORE_MAX else high}'
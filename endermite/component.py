@@ -1,9 +1,14 @@
 __all__ = ['Component', 'ComponentBuilder']
 
+from hashlib import sha1
+
 from .resource import AutoRegisteringResourceClass, ResourceBuilder
 from .component_method import ComponentMethod, ComponentMethodBuilder
 from .function import FunctionBuilder, FunctionTagBuilder
 from .command import CommandMixin
+from .entity_type import EntityTypeTagBuilder
+from .tick import shard_objective
+from .cache import BuildCache, CacheEntry
 
 
 class ComponentMeta(type):
@@ -43,17 +48,49 @@ class ComponentMeta(type):
         for name, method in cls.component_methods.items():
             full_name = prefix + name
             method.function_name = full_name
+            method.defining_name = method.defining_name or full_name
             method.aliases[cls] = full_name
 
         cls.component_tag = f'{cls.namespace}.component.{cls.name}'
         cls.component_function_attach = f'{cls.namespace}:attach/{cls.name}'
         cls.component_function_detach = f'{cls.namespace}:detach/{cls.name}'
+        cls.component_entity_type_tag = f'{cls.namespace}:component/{cls.name}'
+
+        if len(cls.entity_types) > 1:
+            cls.component_entity_type = '#' + cls.component_entity_type_tag
+        else:
+            cls.component_entity_type = ''.join(cls.entity_types)
+
+        cls.component_type_filter = (cls.component_entity_type
+                                     and f',type={cls.component_entity_type}')
 
 
 class Component(AutoRegisteringResourceClass, CommandMixin, metaclass=ComponentMeta):
     component_tag = ''
     component_function_attach = ''
     component_function_detach = ''
+    component_entity_type_tag = ''
+    component_entity_type = ''
+    component_type_filter = ''
+    tick_shards = None
+    entity_types = ()
+
+    def __init_subclass__(cls, namespace=None, abstract=False, shards=None, entity_types=None):
+        super().__init_subclass__(namespace=namespace, abstract=abstract)
+
+        if shards is not None:
+            if not isinstance(shards, int) or shards < 2:
+                raise ValueError(f'Invalid number of shards {shards!r}')
+            cls.tick_shards = shards
+
+        if entity_types is not None:
+            if isinstance(entity_types, str):
+                entity_types = [entity_types]
+            if not entity_types or not all(isinstance(name, str) and name
+                                           for name in entity_types):
+                raise ValueError(f'Invalid entity types {entity_types!r}')
+            cls.entity_types = tuple(name if ':' in name else f'minecraft:{name}'
+                                     for name in entity_types)
 
     def attach(self, component_class):
         if component_class.abstract:
@@ -80,6 +117,31 @@ class ComponentBuilder(ResourceBuilder):
     def build(self):
         self.component_instance = self.resource(ctx=self.ctx)
 
+        for method in self.resource.component_methods.values():
+            method.aliases[self.resource] = method.function_name
+
+        if len(self.resource.entity_types) > 1:
+            self.delegate(EntityTypeTagBuilder, self.resource.component_entity_type_tag,
+                          list(self.resource.entity_types))
+
+        cache = self.ctx[BuildCache]
+        if cache:
+            self.build_cached(cache)
+        else:
+            self.build_resources()
+
+        if self.uses_tick_dispatcher:
+            self.tick_dispatcher.components.append(
+                (self.resource.component_tag, self.dispatched_tick_callbacks)
+            )
+
+        self.tick_counters.periods.update(every for every, _ in self.tick_rates if every > 1)
+
+        if self.resource.tick_shards:
+            self.tick_counters.periods.add(self.resource.tick_shards)
+            self.tick_counters.shard_counts.add(self.resource.tick_shards)
+
+    def build_resources(self):
         for name, method in self.resource.component_methods.items():
             self.delegate(ComponentMethodBuilder, name, method)
 
@@ -87,26 +149,217 @@ class ComponentBuilder(ResourceBuilder):
         self.build_detach_function()
 
         for name in ('tick', 'load'):
-            callback = self.component_callbacks[name]
+            if name == 'tick' and self.project.tick_dispatch == 'shared':
+                continue
+
+            if name == 'tick':
+                callbacks = self.tick_callbacks or [('', self.component_callbacks[name])]
+            else:
+                callbacks = [('', self.component_callbacks[name])]
+
             func = self.generate_function([
-                f'execute as @e[tag={self.resource.component_tag}] run function #{callback}'
+                f'execute {clauses}as @e[{selector}] run function #{callback}'
+                for condition, callback in callbacks
+                for clauses, selector in self.shard_selectors(condition, name == 'tick')
             ])
             self.delegate(FunctionTagBuilder, f'minecraft:{name}', [func])
 
+    def shard_selectors(self, condition, tick):
+        """Yield the conditions and the selectors invoking the callbacks of the entities.
+
+        The callbacks of sharded components that run every tick only
+        process one of the shards each tick. Each shard is invoked with a
+        separate selector filtering the shard score, and only when the
+        tick counter of the shard count matches the shard.
+        """
+        selector = f'tag={self.resource.component_tag}{self.resource.component_type_filter}'
+        shards = self.resource.tick_shards
+
+        if not tick or condition or not shards:
+            yield condition, selector
+            return
+
+        objective = shard_objective(shards)
+        for shard in range(shards):
+            yield (f'if score {self.tick_counters.score(shards)} matches {shard} ',
+                   f'{selector},scores={{{objective}={shard}}}')
+
+    def build_cached(self, cache):
+        """Restore the resources of the component from the cache if possible.
+
+        When the component needs to be built, the functions and function
+        tags are recorded as they're built to create the new cache entry.
+        """
+        name = f'{self.resource.namespace}:{self.name}'
+        key = cache.component_key(self.project, self.resource)
+        entry = cache.get(name, key)
+
+        if entry and self.restore(entry):
+            cache.set(name, entry, restored=True)
+            return
+
+        entry = CacheEntry(key)
+        previous_entry = self.ctx[CacheEntry]
+        self.ctx[CacheEntry] = entry
+        self.build_resources()
+        self.ctx[CacheEntry] = previous_entry
+
+        entry.methods = {
+            builder.name: [builder.body, builder.shared_function]
+            for builder in self if isinstance(builder, ComponentMethodBuilder)
+        }
+        cache.set(name, entry)
+
+    def restore(self, entry):
+        """Recreate the builders recorded in a cache entry.
+
+        The method returns `False` without restoring anything when the
+        bodies of the methods aren't shared with the same functions as
+        when the entry was recorded, which happens when other components
+        changed in the meantime.
+        """
+        methods = self.resource.component_methods
+        if not self.shares_bodies(entry):
+            return False
+
+        method_builders = {}
+        for name, (body, shared_function) in entry.methods.items():
+            builder = ComponentMethodBuilder(self, name, methods[name])
+            builder.share_body(body, shared_function)
+            method_builders[methods[name].function_name] = builder
+
+        for function_name, commands, generated in entry.functions:
+            method_builder = method_builders.get(function_name)
+            parent = self if method_builder is None else method_builder
+
+            name = None if generated else function_name
+            with FunctionBuilder(parent, name, commands).current() as builder:
+                builder.build()
+
+            if method_builder is not None:
+                method_builder.function_builder = builder
+
+        for tag_name, values in entry.function_tags:
+            self.delegate(FunctionTagBuilder, tag_name, values)
+
+        return True
+
+    def shares_bodies(self, entry):
+        """Check that the method bodies of a cache entry are still shared the same way."""
+        methods = self.resource.component_methods
+        if set(entry.methods) != set(methods):
+            return False
+
+        for name, (body, shared_function) in entry.methods.items():
+            key = ComponentMethodBuilder.sharing_key(methods[name].function, self.resource,
+                                                     tuple(body))
+            if self.shared_methods.get(key) != shared_function:
+                return False
+
+        return True
+
+    @property
+    def has_tick_methods(self):
+        return any(method.tick for method in self.resource.component_methods.values())
+
+    def tick_rate(self, method):
+        """Return the period and the offset of a tick method.
+
+        When the project staggers the ticks, methods without an explicit
+        offset get one derived from their function name. This spreads the
+        slow tick methods of different components across the ticks of the
+        period without depending on the other components of the project.
+        """
+        every, offset = method.tick_every, method.tick_offset
+        if offset is None:
+            offset = 0
+            if self.project.stagger_ticks:
+                digest = sha1(method.function_name.encode()).digest()
+                offset = int.from_bytes(digest[:4], 'big') % every
+        return every, offset
+
+    @property
+    def tick_rates(self):
+        return sorted({self.tick_rate(method)
+                       for method in self.resource.component_methods.values() if method.tick})
+
+    def tick_callback(self, rate):
+        """Return the function tag invoking the tick methods with the given rate."""
+        callback = self.component_callbacks['tick']
+        return callback if rate == (1, 0) else f'{callback}/every_{rate[0]}_{rate[1]}'
+
+    @property
+    def tick_callbacks(self):
+        """Return the condition and the function tag of every tick rate.
+
+        The condition is a prefix of `execute` clauses that only pass
+        during the ticks matching the rate.
+        """
+        callbacks = []
+        for every, offset in self.tick_rates:
+            condition = ''
+            if every > 1:
+                condition = f'if score {self.tick_counters.score(every)} matches {offset} '
+            callbacks.append((condition, self.tick_callback((every, offset))))
+        return callbacks
+
+    @property
+    def dispatched_tick_callbacks(self):
+        """Return the tick callbacks as invoked by the shared tick dispatcher.
+
+        The dispatcher already runs as each entity, so the callbacks of
+        sharded components compare the shard score of the entity with the
+        tick counter of the shard count instead.
+        """
+        shards = self.resource.tick_shards
+        if not shards:
+            return self.tick_callbacks
+
+        shard_condition = (f'if score @s {shard_objective(shards)} = '
+                           f'{self.tick_counters.score(shards)} ')
+        return [(condition or shard_condition, callback)
+                for condition, callback in self.tick_callbacks]
+
+    @property
+    def uses_tick_dispatcher(self):
+        return self.project.tick_dispatch == 'shared' and self.has_tick_methods
+
     def build_attach_function(self):
-        func = self.generate_function([
-            f'tag @s add {self.resource.component_tag}',
-            f'function #{self.component_callbacks["init"]}',
-        ])
-        self.delegate(FunctionBuilder, self.resource.component_function_attach, [
-            f'execute unless entity @s[tag={self.resource.component_tag}] run function {func}',
-        ])
+        commands = [f'tag @s add {self.resource.component_tag}']
+        if self.uses_tick_dispatcher:
+            commands.append(f'tag @s add {self.tick_dispatcher.tag}')
+        if self.resource.tick_shards:
+            commands += self.tick_counters.shard_assignment(self.resource.tick_shards)
+        commands.append(f'function #{self.component_callbacks["init"]}')
+
+        func = self.generate_function(commands)
+        entity_type = self.resource.component_entity_type
+
+        if not entity_type:
+            self.delegate(FunctionBuilder, self.resource.component_function_attach, [
+                f'execute unless entity @s[tag={self.resource.component_tag}] run function {func}',
+            ])
+            return
+
+        with FunctionBuilder(self, self.resource.component_function_attach, [
+            f'execute unless entity @s[tag={self.resource.component_tag}] '
+            f'if entity @s[type={entity_type}] run function {func}',
+        ]).current() as builder:
+            self.component_instance.execute(('unless', 'entity', f'@s[type={entity_type}]')).error(
+                'Component', f'"{self.name}"', 'can only be attached to',
+                ', '.join(self.resource.entity_types)
+            )
+            builder.build()
 
     def build_detach_function(self):
-        func = self.generate_function([
+        commands = [
             f'function #{self.component_callbacks["destroy"]}',
             f'tag @s remove {self.resource.component_tag}',
-        ])
+        ]
+        if self.uses_tick_dispatcher:
+            commands.append(f'function {self.tick_dispatcher.refresh_function}')
+
+        func = self.generate_function(commands)
         self.delegate(FunctionBuilder, self.resource.component_function_detach, [
             f'execute if entity @s[tag={self.resource.component_tag}] run function {func}',
         ])
@@ -1,11 +1,12 @@
 __all__ = ['ComponentMethod', 'ComponentMethodBuilder']
 
-from typing import Callable, Dict
+from typing import Callable, Dict, Optional
 from dataclasses import dataclass, field, replace
 from functools import wraps, partial
 
 from .resource import ResourceBuilder
 from .function import FunctionBuilder, FunctionTagBuilder
+from .command.mixin import ExecutionContext
 
 
 @dataclass
@@ -14,11 +15,14 @@ class ComponentMethod:
 
     visibility: str
     tick: bool = False
+    tick_every: int = 1
+    tick_offset: Optional[int] = None
     load: bool = False
     init: bool = False
     destroy: bool = False
     function: Callable = None
     function_name: str = ''
+    defining_name: str = ''
     aliases: Dict[type, str] = field(default_factory=dict)
 
     @classmethod
@@ -54,28 +58,189 @@ class ComponentMethod:
 class ComponentMethodBuilder(ResourceBuilder):
     guard_name = 'component method'
 
+    def __init__(self, parent, name, resource):
+        super().__init__(parent, name, resource)
+        self.function_builder = None
+        self.body = []
+        self.shared_function = None
+
     def build(self):
         function_name = self.resource.function_name
-        function = self.resource.function
+        component = self.component_instance
+        method_guard = self.project.method_guard
 
-        with FunctionBuilder(self, function_name, []).current() as builder:
-            identifier = next(self.tag_names)
-            selector = f'@e[tag={identifier}]'
-            component = self.component_instance
+        scope = component.execute(('as', self.global_guard_selector))
 
-            component.execute(('if', 'entity', selector)).error(
-                'Recursive method invocation', f'"{function.__qualname__}()"',
-                'in module', f'"{function.__module__}"'
-            )
+        with FunctionBuilder(self, None, []).current() as body_builder:
+            previous_context = self.ctx[ExecutionContext]
+            self.ctx[ExecutionContext] = scope.execution_context
+            self.resource.function(scope)
+            self.ctx[ExecutionContext] = previous_context
 
-            with component.execute(('unless', 'entity', selector)):
-                component.add_tag(identifier)
-                with component.execute(('as', selector)) as scope:
-                    function(scope)
-                component.remove_tag(identifier)
+        key = self.sharing_key(self.resource.function, component,
+                               tuple(map(str, body_builder.resource)))
+        shared_function = self.shared_methods.get(key)
+        body = partial(self.replay_body, body_builder)
+
+        with FunctionBuilder(self, function_name, []).current() as builder:
+            self.function_builder = builder
+
+            if shared_function:
+                component.run('function', shared_function)
+            elif method_guard == 'global':
+                self.build_global_guard(body)
+            elif method_guard == 'entity':
+                self.build_entity_guard(body)
+            elif self.selects_entity(body_builder):
+                self.build_entity_tag(body)
+            else:
+                body(component)
 
             builder.build()
 
+        body_builder.detach()
+        self.share_body(key[-1], shared_function)
+
         for name, callback in self.component_callbacks.items():
             if getattr(self.resource, name):
-                self.delegate(FunctionTagBuilder, callback, [function_name])
+                if name == 'tick':
+                    callback = self.tick_callback(self.tick_rate(self.resource))
+                self.delegate(FunctionTagBuilder, callback, [shared_function or function_name])
+
+    def share_body(self, body, shared_function):
+        """Make the method function available to the components with the same body.
+
+        When the body was already built for another component, the method
+        becomes an alias of the function of the other component instead.
+        """
+        self.body = list(body)
+        self.shared_function = shared_function
+
+        if shared_function:
+            self.resource.aliases[type(self.component_instance)] = shared_function
+        else:
+            key = self.sharing_key(self.resource.function, self.component_instance, tuple(body))
+            self.shared_methods[key] = self.resource.function_name
+
+    @staticmethod
+    def sharing_key(function, component, body):
+        """Return the key of the components that can share the method function.
+
+        The function of the method re-selects the entity with a selector
+        that filters the entity types of the component, so the body can
+        only be shared between components with the same entity types.
+        """
+        return (function, component.component_type_filter, body)
+
+    def selects_entity(self, body_builder):
+        """Check if the body selects the entity running the method again.
+
+        The body runs with an instance that selects the entities tagged by
+        the guard, so commands invoked on `self` from nested execution
+        contexts still run as the entity running the method. The selector
+        only shows up in the body when it's used from a nested context.
+        """
+        selector = self.global_guard_selector
+        builders = [body_builder]
+
+        while builders:
+            builder = builders.pop()
+            if any(selector in str(command) for command in builder.resource):
+                return True
+            builders += [child for child in builder if isinstance(child, FunctionBuilder)]
+
+        return False
+
+    @staticmethod
+    def replay_body(body_builder, component):
+        """Move the commands and the functions of the body to the current function.
+
+        The body of the method is built before knowing if it's identical
+        to the body built for another component inheriting the method.
+        """
+        builder = component.ctx[FunctionBuilder]
+        builder.resource.extend(body_builder.resource)
+
+        for child in body_builder:
+            child.parent = builder
+        builder.extend(body_builder)
+        body_builder.clear()
+
+    def build_global_guard(self, body):
+        """Prevent recursion by tagging the entity and scanning for the tag."""
+        identifier = self.guard_tag
+        selector = self.global_guard_selector
+        component = self.component_instance
+
+        self.report_recursion(component.execute(('if', 'entity', selector)))
+
+        with component.execute(('unless', 'entity', selector)):
+            component.add_tag(identifier)
+            with component.execute(('as', selector)) as scope:
+                body(scope)
+            component.remove_tag(identifier)
+
+    def build_entity_guard(self, body):
+        """Prevent recursion by tagging the entity and only checking `@s`."""
+        identifier = self.guard_tag
+        selector = f'@s[tag={identifier}]'
+        component = self.component_instance
+
+        self.report_recursion(component.execute(('if', 'entity', selector)))
+
+        with component.execute(('unless', 'entity', selector)) as scope:
+            scope.add_tag(identifier)
+            body(scope)
+            scope.remove_tag(identifier)
+
+    def build_entity_tag(self, body):
+        """Tag the entity running the method without guarding against recursion."""
+        identifier = self.guard_tag
+        component = self.component_instance
+
+        component.add_tag(identifier)
+        body(component)
+        component.remove_tag(identifier)
+
+    @property
+    def guard_tag(self):
+        """Return the tag marking the entities currently running the method.
+
+        The tag is derived from the function of the component defining the
+        method, so the components inheriting the method use the same tag
+        and can share bodies that select the entity from nested contexts.
+        """
+        return self.resource.defining_name.replace(':', '.').replace('/', '.') + '.guard'
+
+    @property
+    def global_guard_selector(self):
+        """Return the selector scanning for the entities running the method."""
+        return f'@e[tag={self.guard_tag}{self.component_instance.component_type_filter}]'
+
+    def report_recursion(self, component):
+        function = self.resource.function
+        component.error(
+            'Recursive method invocation', f'"{function.__qualname__}()"',
+            'in module', f'"{function.__module__}"'
+        )
+
+    def guard_recursion(self):
+        """Wrap the already built method function in a recursion guard.
+
+        The project calls this method after analyzing its call graph when
+        the guard is only required for methods that can invoke themselves.
+        The guard already tags the entity, so the tag added for nested
+        contexts is removed from the function.
+        """
+        builder = self.function_builder
+        commands = builder.resource
+
+        if commands and commands[0] == f'tag @s add {self.guard_tag}':
+            commands = commands[1:-1]
+
+        body_function = self.generate_function(commands)
+        builder.resource = []
+
+        with builder.current():
+            self.build_entity_guard(lambda scope: scope.run('function', body_function))
+            builder.build()
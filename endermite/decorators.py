@@ -1,5 +1,7 @@
 __all__ = ['public', 'private', 'tick', 'load', 'init', 'destroy']
 
+from functools import partial
+
 from .component_method import ComponentMethod
 
 
@@ -13,9 +15,21 @@ def private(method):
     return ComponentMethod.apply(method, visibility='private')
 
 
-def tick(method):
-    """Make the method execute every tick."""
-    return ComponentMethod.apply(method, tick=True)
+def tick(method=None, *, every=1, offset=None):
+    """Make the method execute every tick, or once every `every` ticks.
+
+    The offset selects the tick of the period during which the method
+    runs. Without an offset, the method runs during the first tick of the
+    period, unless the project staggers the ticks automatically.
+    """
+    if not isinstance(every, int) or every < 1:
+        raise ValueError(f'Invalid tick period {every!r}')
+    if offset is not None and (not isinstance(offset, int) or not 0 <= offset < every):
+        raise ValueError(f'Invalid tick offset {offset!r} for a period of {every} ticks')
+
+    if method is None:
+        return partial(tick, every=every, offset=offset)
+    return ComponentMethod.apply(method, tick=True, tick_every=every, tick_offset=offset)
 
 
 def load(method):
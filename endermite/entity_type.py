@@ -0,0 +1,20 @@
+__all__ = ['EntityTypeTagBuilder']
+
+from mcpack import EntityTypeTag
+
+from .output import SinkWriterMixin
+from .resource import ResourceBuilder
+
+
+class EntityTypeTagBuilder(SinkWriterMixin, ResourceBuilder):
+    guard_name = 'entity type tag'
+
+    def build(self):
+        self.write_to_sink()
+
+    def populate(self, pack):
+        super().populate(pack)
+        pack[self.name] = EntityTypeTag(list(self.resource))
+
+    def write(self, sink):
+        sink.write(self.name, EntityTypeTag(list(self.resource)))
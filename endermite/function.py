@@ -1,31 +1,79 @@
 __all__ = ['FunctionBuilder']
 
+from sys import intern
+
 from mcpack import Function, FunctionTag
 
 from . import __version__
+from .cache import CacheEntry
+from .output import SinkWriterMixin
 from .resource import ResourceBuilder
 
 
-class FunctionBuilder(ResourceBuilder):
+class FunctionBuilder(SinkWriterMixin, ResourceBuilder):
+    """Build a function from a list of commands.
+
+    Functions created without a name are generated functions. They get
+    named after their body once they're built, and only the first of
+    several generated functions with the same body is kept. The body of
+    the function file is only assembled when the function gets written,
+    so built functions only hold their commands.
+    """
+
     guard_name = 'function'
 
+    header = (f'# Generated by endermite v{__version__}\n'
+              '# Modifications will be overwritten\n\n')
+
     def __init__(self, parent, name, resource):
-        super().__init__(parent, name, resource)
-        self.function_body = (f'# Generated by endermite v{__version__}\n'
-                              '# Modifications will be overwritten\n\n')
+        super().__init__(parent, name or 'generated function', resource)
+        self.command_count = None
+        self.unnamed = name is None
+
+    def register_command(self, command):
+        """Add a serialized command to the function.
 
-    def register_command(self, command_object):
-        self.resource.append(command_object)
+        Commands are interned because data packs repeat the same commands
+        across many functions, so identical commands share a single string.
+        """
+        self.resource.append(intern(str(command)))
+
+    @property
+    def function_body(self):
+        body = '\n'.join(map(str, self.resource))
+        return f'{self.header}{body}\n'
 
     def build(self):
-        self.function_body += '\n'.join(map(str, self.resource)) + '\n'
+        self.command_count = len(self.resource)
+
+        generated, duplicate = self.unnamed, False
+        if generated:
+            self.unnamed = False
+            body = '\n'.join(map(str, self.resource))
+            self.name, duplicate = self.generated_function_name(body)
+
+        entry = self.ctx[CacheEntry]
+        if entry:
+            entry.add_function(self.name, self.resource, generated)
+
+        if duplicate:
+            self.detach()
+            return
+
+        self.write_to_sink()
 
     def populate(self, pack):
         super().populate(pack)
         pack[self.name] = Function(self.function_body)
+        self.resource = []
+
+    def write(self, sink):
+        """Write the function to the sink and release the commands."""
+        sink.write(self.name, Function(self.function_body))
+        self.resource = []
 
 
-class FunctionTagBuilder(ResourceBuilder):
+class FunctionTagBuilder(SinkWriterMixin, ResourceBuilder):
     guard_name = 'function tag'
 
     def __init__(self, parent, name, resource):
@@ -33,7 +81,13 @@ class FunctionTagBuilder(ResourceBuilder):
         self.values = []
 
     def build(self):
-        self.values.extend(map(str, self.resource))
+        self.values = list(map(str, self.resource))
+
+        entry = self.ctx[CacheEntry]
+        if entry:
+            entry.add_function_tag(self.name, self.values)
+
+        self.write_to_sink()
 
     def populate(self, pack):
         super().populate(pack)
@@ -43,3 +97,8 @@ class FunctionTagBuilder(ResourceBuilder):
         function_tag = tags.get(name, FunctionTag([]))
         function_tag.values.extend(self.values)
         tags[name] = function_tag
+
+    def write(self, sink):
+        """Hand the values of the tag to the sink."""
+        sink.extend_function_tag(self.name, self.values)
+        self.values = []
@@ -0,0 +1,105 @@
+__all__ = ['FunctionInstrumentation']
+
+import json
+from hashlib import sha1
+
+from .function import FunctionBuilder, FunctionTagBuilder
+
+
+class FunctionInstrumentation:
+    """Count the invocations of every function of a built project.
+
+    Each function starts by incrementing a counter dedicated to it, and
+    the project gets functions that create the objectives, count the ticks
+    elapsed since the last reset, and display or reset the counters. The
+    report function selects the most invoked functions one at a time, so
+    it only displays the hottest functions of the current tick window.
+    """
+
+    calls_objective = 'endermite.calls'
+    report_objective = 'endermite.top'
+
+    def __init__(self, project_builder, limit=10):
+        self.project_builder = project_builder
+        self.limit = limit
+        self.name = project_builder.name
+        self.counters = {}
+        self.tick_counter = f'#{self.name}'
+        self.max_counter = f'#{self.name}.max'
+        self.functions = {name: f'{self.name}:profile/{name}'
+                          for name in ('load', 'tick', 'report', 'reset', 'top')}
+
+    def instrument(self):
+        """Add the counters to the functions and build the profiling functions."""
+        self.instrument_functions(self.project_builder)
+        self.build_functions()
+
+    def instrument_functions(self, builder):
+        for child in builder:
+            if isinstance(child, FunctionBuilder):
+                counter = self.counter(child.name)
+                child.resource = [f'scoreboard players add {counter} {self.calls_objective} 1',
+                                  *child.resource]
+                child.build()
+            self.instrument_functions(child)
+
+    def counter(self, function_name):
+        """Return the fake player counting the invocations of a function."""
+        if function_name not in self.counters:
+            digest = sha1(function_name.encode()).hexdigest()
+            self.counters[function_name] = f'#{self.name}.{digest[:8]}'
+        return self.counters[function_name]
+
+    def build_functions(self):
+        project_builder, functions = self.project_builder, self.functions
+        calls, top = self.calls_objective, self.report_objective
+
+        project_builder.delegate(FunctionBuilder, functions['load'], [
+            f'scoreboard objectives add {calls} dummy',
+            f'scoreboard objectives add {top} dummy',
+        ])
+        project_builder.delegate(FunctionTagBuilder, 'minecraft:load', [functions['load']])
+
+        project_builder.delegate(FunctionBuilder, functions['tick'], [
+            f'scoreboard players add {self.tick_counter} {calls} 1',
+        ])
+        project_builder.delegate(FunctionTagBuilder, 'minecraft:tick', [functions['tick']])
+
+        project_builder.delegate(FunctionBuilder, functions['reset'], [
+            f'scoreboard players reset {counter} {calls}'
+            for counter in [self.tick_counter, *self.counters.values()]
+        ])
+
+        entries = []
+        for function_name, counter in sorted(self.counters.items()):
+            entry = project_builder.generate_function([
+                'tellraw @a ' + json.dumps([
+                    '',
+                    {'score': {'name': counter, 'objective': top}, 'color': 'gold'},
+                    {'text': f' {function_name}', 'color': 'gray'},
+                ]),
+                f'scoreboard players set {counter} {top} 0',
+                f'scoreboard players set {self.max_counter} {top} 0',
+            ])
+            entries.append(f'execute if score {self.max_counter} {top} matches 1.. '
+                           f'if score {counter} {top} = {self.max_counter} {top} '
+                           f'run function {entry}')
+
+        project_builder.delegate(FunctionBuilder, functions['top'], [
+            f'scoreboard players set {self.max_counter} {top} 0',
+            *(f'scoreboard players operation {self.max_counter} {top} > {counter} {top}'
+              for counter in self.counters.values()),
+            *entries,
+        ])
+
+        project_builder.delegate(FunctionBuilder, functions['report'], [
+            'tellraw @a ' + json.dumps([
+                '',
+                {'text': f'Calls to the functions of {self.name} over ', 'color': 'gray'},
+                {'score': {'name': self.tick_counter, 'objective': calls}, 'color': 'gold'},
+                {'text': ' ticks', 'color': 'gray'},
+            ]),
+            *(f'scoreboard players operation {counter} {top} = {counter} {calls}'
+              for counter in self.counters.values()),
+            *[f'function {functions["top"]}'] * self.limit,
+        ])
@@ -0,0 +1,162 @@
+__all__ = ['FunctionOptimizer']
+
+from .analysis import parse_function_call
+from .function import FunctionBuilder, FunctionTagBuilder
+
+
+class FunctionOptimizer:
+    """Simplify the generated functions of a built project.
+
+    The optimizer only touches the functions created with
+    `generate_function`, because their names are not part of the public
+    interface of the data pack. It repeatedly deduplicates the functions
+    with identical bodies, inlines the functions that contain at most one
+    command into their callers and removes the functions that are not
+    referenced anymore, until nothing changes.
+    """
+
+    def __init__(self, project_builder):
+        self.project_builder = project_builder
+        self.prefix = f'{project_builder.name}:generated/'
+        self.functions = {}
+        self.tags = []
+        self.merged = 0
+        self.inlined = 0
+        self.removed = 0
+
+    def optimize(self):
+        """Optimize the functions until reaching a fixpoint and rebuild them."""
+        self.collect(self.project_builder)
+
+        while self.deduplicate() | self.inline() | self.prune():
+            pass
+
+        for builder in self.functions.values():
+            builder.build()
+        for builder in self.tags:
+            builder.build()
+
+    def collect(self, builder):
+        """Gather the function and function tag builders of the tree."""
+        if isinstance(builder, FunctionBuilder):
+            self.functions[builder.name] = builder
+        elif isinstance(builder, FunctionTagBuilder):
+            self.tags.append(builder)
+
+        for child in builder:
+            self.collect(child)
+
+    def is_generated(self, function_name):
+        return function_name.startswith(self.prefix)
+
+    def deduplicate(self):
+        """Replace the generated functions that have the same body by a single one."""
+        bodies = {}
+        replacements = {}
+
+        for name, builder in self.functions.items():
+            if self.is_generated(name):
+                body = tuple(map(str, builder.resource))
+                original = bodies.setdefault(body, name)
+                if original != name:
+                    replacements[name] = original
+
+        if not replacements:
+            return False
+
+        for builder in self.functions.values():
+            builder.resource = [self.rename_call(str(command), replacements)
+                                for command in builder.resource]
+
+        for builder in self.tags:
+            builder.resource = [replacements.get(str(value), value)
+                                for value in builder.resource]
+
+        self.merged += len(replacements)
+        return True
+
+    @staticmethod
+    def rename_call(command, replacements):
+        callee = parse_function_call(command)
+        if callee not in replacements:
+            return command
+        return command[:-len(callee)] + replacements[callee]
+
+    def inline(self):
+        """Inline the generated functions that contain at most one command."""
+        changed = False
+
+        for builder in self.functions.values():
+            commands = []
+
+            for command in map(str, builder.resource):
+                callee = parse_function_call(command)
+                callee_builder = self.functions.get(callee)
+
+                if (callee_builder is None or callee_builder is builder
+                        or not self.is_generated(callee)
+                        or len(callee_builder.resource) > 1):
+                    commands.append(command)
+                    continue
+
+                body = list(map(str, callee_builder.resource))
+                if body and parse_function_call(body[0]) == callee:
+                    commands.append(command)
+                    continue
+
+                inlined = inline_command(command, body[0] if body else None)
+                if inlined is False:
+                    commands.append(command)
+                    continue
+
+                if inlined is not None:
+                    commands.append(inlined)
+                self.inlined += 1
+                changed = True
+
+            builder.resource = commands
+
+        return changed
+
+    def prune(self):
+        """Remove the generated functions that are not referenced anymore."""
+        referenced = {str(value) for builder in self.tags for value in builder.resource}
+
+        for builder in self.functions.values():
+            for command in builder.resource:
+                callee = parse_function_call(str(command))
+                if callee != builder.name:
+                    referenced.add(callee)
+
+        unreferenced = [name for name in self.functions
+                        if self.is_generated(name) and name not in referenced]
+
+        for name in unreferenced:
+            self.functions.pop(name).detach()
+
+        self.removed += len(unreferenced)
+        return bool(unreferenced)
+
+
+def inline_command(command, body):
+    """Return the command that results from inlining a function call.
+
+    The function returns `None` when the call can be dropped because the
+    invoked function is empty, and `False` when the call can't be inlined.
+    """
+    tokens = command.split(' ')
+    clauses = tokens[:-2]
+
+    if not clauses:
+        return body
+
+    if 'store' in clauses:
+        return False
+
+    if body is None:
+        return None
+
+    if body.startswith('execute '):
+        return ' '.join(clauses[:-1]) + body[len('execute'):]
+
+    return ' '.join(clauses) + ' ' + body
@@ -0,0 +1,374 @@
+__all__ = [
+    'DirectoryWriter',
+    'ZipWriter',
+    'DataPackSink',
+    'SinkWriterMixin',
+    'data_pack_files',
+    'dump_data_pack',
+    'open_writer',
+]
+
+import os
+import json
+import zlib
+import struct
+import shutil
+import zipfile
+import tempfile
+from hashlib import sha1
+from pathlib import Path
+from typing import NamedTuple
+from collections import defaultdict
+from dataclasses import fields, asdict
+from concurrent.futures import ThreadPoolExecutor
+
+from mcpack import Function, FunctionTag, JsonItem
+
+
+MANIFEST_FILENAME = '.endermite-manifest.json'
+
+
+def serialize_item(item):
+    """Return the content of the file that mcpack would write for the item."""
+    if isinstance(item, Function):
+        return item.body.encode()
+
+    if isinstance(item, JsonItem):
+        return serialize_json({key: value for key, value in asdict(item).items()
+                               if value is not None})
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'item'
+        item.dump(path)
+        return path.read_bytes()
+
+
+def serialize_json(json_data):
+    return json.dumps(json_data, indent=4).encode()
+
+
+def data_pack_files(pack):
+    """Yield the filename and the content of every file of a data pack."""
+    yield 'pack.mcmeta', serialize_json(pack.mcmeta)
+
+    for namespace_name, namespace in pack.namespaces.items():
+        for namespace_field in fields(namespace):
+            item_type = namespace_field.type.__args__[1]
+            base_path = f'data/{namespace_name}/{item_type.folder}/'
+
+            for name, item in getattr(namespace, namespace_field.name).items():
+                yield base_path + name + item_type.extension, serialize_item(item)
+
+
+def dump_data_pack(pack, path, zipped=False):
+    """Write the data pack in the given directory and return the writer."""
+    with open_writer(path, pack.name, zipped) as writer:
+        for filename, content in data_pack_files(pack):
+            writer.write(filename, content)
+    return writer
+
+
+def open_writer(path, name, zipped=False):
+    """Return a writer for the data pack with the given name.
+
+    The output of the other mode gets removed, otherwise minecraft would
+    load both the directory and the archive.
+    """
+    directory_path = Path(path) / name
+    archive_path = Path(path) / f'{name}.zip'
+
+    if zipped:
+        if directory_path.is_dir():
+            shutil.rmtree(directory_path)
+        return ZipWriter(archive_path)
+
+    if archive_path.is_file():
+        archive_path.unlink()
+    return DirectoryWriter(directory_path)
+
+
+class DataPackSink:
+    """Hand the resources of a data pack to a writer as soon as they're built.
+
+    Function tags can be extended by several builders, so their values
+    are accumulated and only written when the sink is finished.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.function_tags = defaultdict(list)
+
+    def write(self, name, item):
+        """Serialize an item and write it right away."""
+        namespace, _, path = name.partition(':')
+        filename = f'data/{namespace}/{item.folder}/{path}{item.extension}'
+        self.writer.write(filename, serialize_item(item))
+
+    def extend_function_tag(self, name, values):
+        self.function_tags[name].extend(values)
+
+    def finish(self, pack):
+        """Write the function tags and the metadata of the given data pack."""
+        for name, values in self.function_tags.items():
+            self.write(name, FunctionTag(values))
+        self.function_tags.clear()
+        self.writer.write('pack.mcmeta', serialize_json(pack.mcmeta))
+
+
+class SinkWriterMixin:
+    """Write what a builder built to the data pack sink of the project.
+
+    When the project streams its data pack, the builder writes its
+    resource as soon as it's built. Otherwise the resource gets written
+    when the builders are flushed to a sink.
+    """
+
+    def write_to_sink(self):
+        """Write the resource right away if the project streams its data pack."""
+        sink = self.ctx[DataPackSink]
+        if sink:
+            self.write(sink)
+
+    def flush(self, sink):
+        super().flush(sink)
+        self.write(sink)
+
+    def write(self, sink):
+        raise NotImplementedError()
+
+
+class DirectoryWriter:
+    """Write files to a directory, leaving the unchanged ones untouched.
+
+    The writer keeps a manifest that maps every file to the hash of its
+    content. Files that still have the same hash as in the manifest of
+    the previous build are not rewritten unless the file on disk was
+    modified in the meantime, and files that are not part of the new
+    build get deleted when the writer is closed.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest_path = self.path / MANIFEST_FILENAME
+        self.previous_manifest = self.load_manifest()
+        self.manifest = {}
+        self.written = 0
+        self.deleted = 0
+
+    def load_manifest(self):
+        """Load the manifest of the previous build."""
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            if self.path.is_dir():
+                shutil.rmtree(self.path)
+            return {}
+
+    def write(self, filename, content):
+        """Write the file if its content changed since the previous build."""
+        digest = sha1(content).hexdigest()
+        self.manifest[filename] = digest
+
+        path = self.path / filename
+        if self.previous_manifest.get(filename) == digest and self.unmodified(path, content):
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        self.written += 1
+
+    @staticmethod
+    def unmodified(path, content):
+        """Check that the file on disk still has the given content."""
+        try:
+            if path.stat().st_size != len(content):
+                return False
+            return path.read_bytes() == content
+        except OSError:
+            return False
+
+    def close(self):
+        """Delete stale files and save the manifest."""
+        for filename in self.previous_manifest.keys() - self.manifest.keys():
+            self.delete(filename)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.manifest_path.write_text(json.dumps(self.manifest, indent=4, sort_keys=True))
+
+    def delete(self, filename):
+        """Delete a file and the directories that become empty."""
+        path = self.path / filename
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        self.deleted += 1
+
+        for directory in path.parents:
+            if directory == self.path or any(directory.iterdir()):
+                break
+            directory.rmdir()
+
+    def __enter__(self):
+        return self
+
+    def abort(self):
+        """Save the manifest without deleting anything.
+
+        The files written before the failure are added to the previous
+        manifest so that the next build can still clean them up.
+        """
+        if self.path.is_dir():
+            manifest = {**self.previous_manifest, **self.manifest}
+            self.manifest_path.write_text(json.dumps(manifest, indent=4, sort_keys=True))
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+ZIP_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+ZIP_END_RECORD = struct.Struct('<4s4H2LH')
+ZIP64_END_RECORD = struct.Struct('<4sQ2H2L4Q')
+ZIP64_END_LOCATOR = struct.Struct('<4sLQL')
+
+ZIP_VERSION = 20
+ZIP64_VERSION = 45
+ZIP_UTF8_FLAG = 0x800
+
+# Every entry uses 1980-01-01 00:00:00, the earliest date in the dos format
+ZIP_TIME = 0
+ZIP_DATE = (1 << 5) | 1
+
+
+class CompressedEntry(NamedTuple):
+    crc: int
+    size: int
+    method: int
+    data: bytes
+
+
+def compress_entry(content, level):
+    """Compress the content of an archive entry.
+
+    The content is stored as is when compressing it doesn't save space.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = compressor.compress(content) + compressor.flush()
+    if len(data) >= len(content):
+        return CompressedEntry(zlib.crc32(content), len(content), zipfile.ZIP_STORED, content)
+    return CompressedEntry(zlib.crc32(content), len(content), zipfile.ZIP_DEFLATED, data)
+
+
+class ZipWriter:
+    """Write files to a deterministic zip archive.
+
+    Entries are compressed in a thread pool as soon as they're written,
+    and the archive is assembled when the writer is closed. The entries
+    are sorted and use a fixed timestamp, so building the same data pack
+    twice produces the exact same archive. The archive is left untouched
+    when none of its entries changed.
+    """
+
+    def __init__(self, path, level=6, max_workers=None):
+        self.path = Path(path)
+        self.level = level
+        self.previous_entries = self.load_entries()
+        self.entries = {}
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.written = 0
+        self.deleted = 0
+
+    def load_entries(self):
+        """Return the checksum of every entry of the previous archive."""
+        try:
+            with zipfile.ZipFile(self.path) as archive:
+                return {info.filename: info.CRC for info in archive.infolist()}
+        except (OSError, zipfile.BadZipFile):
+            return {}
+
+    def write(self, filename, content):
+        """Schedule the compression of an entry."""
+        self.entries[filename] = self.executor.submit(compress_entry, content, self.level)
+
+    def close(self):
+        """Wait for the compressed entries and write the archive if it changed."""
+        try:
+            entries = {filename: future.result()
+                       for filename, future in sorted(self.entries.items())}
+        finally:
+            self.executor.shutdown()
+
+        self.written = sum(self.previous_entries.get(filename) != entry.crc
+                           for filename, entry in entries.items())
+        self.deleted = len(self.previous_entries.keys() - entries.keys())
+
+        if self.path.is_file() and not self.written and not self.deleted:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temporary_path, 'wb') as archive:
+            write_zip_archive(archive, entries)
+        os.replace(temporary_path, self.path)
+
+    def abort(self):
+        """Discard the entries without touching the previous archive."""
+        self.executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_zip_archive(archive, entries):
+    """Write the compressed entries to a binary file as a zip archive."""
+    central_directory = []
+    offset = 0
+
+    for filename, entry in entries.items():
+        name = filename.encode()
+        flags = 0 if name.isascii() else ZIP_UTF8_FLAG
+
+        if offset > 0xffffffff:
+            raise ValueError('The archive is too large')
+
+        header = ZIP_LOCAL_HEADER.pack(
+            b'PK\x03\x04', ZIP_VERSION, flags, entry.method, ZIP_TIME, ZIP_DATE,
+            entry.crc, len(entry.data), entry.size, len(name), 0,
+        )
+        archive.write(header + name)
+        archive.write(entry.data)
+
+        central_directory.append(ZIP_CENTRAL_HEADER.pack(
+            b'PK\x01\x02', ZIP_VERSION, ZIP_VERSION, flags, entry.method, ZIP_TIME, ZIP_DATE,
+            entry.crc, len(entry.data), entry.size, len(name), 0, 0, 0, 0, 0, offset,
+        ) + name)
+
+        offset += len(header) + len(name) + len(entry.data)
+
+    directory_data = b''.join(central_directory)
+    archive.write(directory_data)
+
+    count = len(central_directory)
+    size = len(directory_data)
+
+    if count >= 0xffff or size >= 0xffffffff or offset >= 0xffffffff:
+        archive.write(ZIP64_END_RECORD.pack(
+            b'PK\x06\x06', ZIP64_END_RECORD.size - 12, ZIP64_VERSION, ZIP64_VERSION,
+            0, 0, count, count, size, offset,
+        ))
+        archive.write(ZIP64_END_LOCATOR.pack(b'PK\x06\x07', 0, offset + size, 1))
+        count = min(count, 0xffff)
+        size = min(size, 0xffffffff)
+        offset = min(offset, 0xffffffff)
+
+    archive.write(ZIP_END_RECORD.pack(b'PK\x05\x06', 0, 0, count, count, size, offset, 0))
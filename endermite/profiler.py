@@ -0,0 +1,79 @@
+__all__ = ['BuildProfiler', 'profile_phase']
+
+import time
+from contextlib import contextmanager, nullcontext
+
+
+def profile_phase(profiler, name):
+    """Measure a phase of the build if the profiler is enabled."""
+    return profiler.phase(name) if profiler else nullcontext()
+
+
+class BuildProfiler:
+    """Record timing information about the different steps of a build.
+
+    The profiler measures the phases of the build (importing the project,
+    building the resources, populating and writing the data pack) as well
+    as the time spent in every builder of the resource tree.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.tree = None
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        """Measure the duration of a phase of the build."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    @contextmanager
+    def measure(self, builder):
+        """Measure the time spent while the builder is the current one.
+
+        Builders are nested in the report according to the order in
+        which they become current, so resources generated on behalf of a
+        builder are attributed to it.
+        """
+        node = {
+            'name': builder.name,
+            'builder': builder.guard_name,
+            'time': 0,
+            'self_time': 0,
+            'functions': 0,
+            'commands': 0,
+            'children': [],
+        }
+
+        if self._stack:
+            self._stack[-1]['children'].append(node)
+        else:
+            self.tree = node
+
+        self._stack.append(node)
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            node['time'] = time.perf_counter() - start_time
+            node['name'] = builder.name
+            self._stack.pop()
+
+            commands = getattr(builder, 'command_count', None)
+            children = node['children']
+            children.sort(key=lambda child: child['time'], reverse=True)
+
+            node['self_time'] = node['time'] - sum(child['time'] for child in children)
+            node['functions'] = ((commands is not None)
+                                 + sum(child['functions'] for child in children))
+            node['commands'] = (commands or 0) + sum(child['commands'] for child in children)
+
+    def as_dict(self):
+        """Return the profiling data as a json-serializable dictionary."""
+        return {'phases': self.phases, 'tree': self.tree}
@@ -1,13 +1,22 @@
-__all__ = ['Project', 'find_resources']
+__all__ = ['Project', 'BuildPasses', 'find_resources']
 
-from typing import List
+from typing import List, NamedTuple, Optional
+from hashlib import sha1
 from dataclasses import dataclass, field
 from mcpack import DataPack
 
 from .component import Component, ComponentBuilder
+from .component_method import ComponentMethodBuilder
+from .analysis import RuntimeCostAnalysis, call_graph, recursive_functions
 from .function import FunctionBuilder
 from .resource import ResourceBuilder
-from .utils import import_submodules, name_generator
+from .cache import BuildCache
+from .output import DataPackSink
+from .optimizer import FunctionOptimizer
+from .tick import TickDispatcher, TickCounters
+from .instrument import FunctionInstrumentation
+from .profiler import BuildProfiler, profile_phase
+from .utils import import_submodules
 
 
 def find_resources(package):
@@ -18,6 +27,25 @@ def find_resources(package):
     }
 
 
+class BuildPasses(NamedTuple):
+    """Optional passes and outputs of the build of a project.
+
+    The profiler records the time spent in every builder, and the
+    analysis inspects the built resources before they're added to the
+    data pack. When a sink is provided, the resources are written to the
+    sink instead of being added to a data pack. The build cache restores
+    the resources of the components that didn't change since the entries
+    were recorded, and `instrument` makes every function count its
+    invocations.
+    """
+
+    profiler: Optional[BuildProfiler] = None
+    analysis: Optional[RuntimeCostAnalysis] = None
+    sink: Optional[DataPackSink] = None
+    cache: Optional[BuildCache] = None
+    instrument: bool = False
+
+
 @dataclass
 class Project:
     """Class representing an endermite project."""
@@ -27,29 +55,86 @@ class Project:
     author: str = 'N/A'
     version: str = '0.1.0'
     components: List[Component] = field(default_factory=list)
+    tick_dispatch: str = 'component'
+    method_guard: str = 'global'
+    optimize: bool = False
+    flatten_execute: bool = False
+    stagger_ticks: bool = False
+    zipped: bool = False
+
+    def build(self, passes=BuildPasses()):
+        """Build the project and return the generated data pack.
+
+        When the `optimize` option is enabled, the generated functions are
+        simplified before the analysis.
+
+        When a sink is provided, the method returns `None`. Functions are
+        then written and released as soon as they're built, unless a pass
+        that needs the whole tree is enabled, in which case they're
+        written once every pass is done.
+
+        It's up to the caller to save the build cache once the data pack is
+        written. The instrumentation happens after the analysis, so the
+        estimated costs don't include the counters.
+        """
+        profiler, sink = passes.profiler, passes.sink
+        streaming = sink and not (passes.analysis or passes.instrument or self.optimize
+                                  or self.method_guard == 'auto')
 
-    def build(self):
-        """Build the project and return the generated data pack."""
         builder = ProjectBuilder(self.name, self)
+        builder.ctx[BuildProfiler] = profiler
+        builder.ctx[DataPackSink] = sink if streaming else None
+        builder.ctx[BuildCache] = passes.cache
 
-        with builder.current():
+        with profile_phase(profiler, 'build'), builder.current():
             builder.build()
 
-        pack = builder.create_data_pack()
-        builder.populate(pack)
-        return pack
+        if self.optimize:
+            with profile_phase(profiler, 'optimize'):
+                FunctionOptimizer(builder).optimize()
+
+        if passes.analysis:
+            with profile_phase(profiler, 'analysis'):
+                passes.analysis.analyze(builder)
+
+        if passes.instrument:
+            with profile_phase(profiler, 'instrument'):
+                FunctionInstrumentation(builder).instrument()
+
+        with profile_phase(profiler, 'populate'):
+            pack = builder.create_data_pack()
+
+            if not sink:
+                builder.populate(pack)
+                return pack
+
+            if not streaming:
+                builder.flush(sink)
+            sink.finish(pack)
+
+        return None
 
 
 class ProjectBuilder(ResourceBuilder):
     guard_name = 'project'
+    tick_dispatch_modes = ('component', 'shared')
+    method_guard_modes = ('global', 'entity', 'auto', 'none')
 
     def __init__(self, name, resource):
         super().__init__(None, name, resource)
+        self.project = resource
         self.description = ''
-        self.function_names = name_generator(f'{self.name}:generated/{{name}}')
-        self.tag_names = name_generator(f'{self.name}.generated.{{name}}')
+        self.generated_functions = {}
+        self.shared_methods = {}
+        self.tick_dispatcher = TickDispatcher(self.name)
+        self.tick_counters = TickCounters(self.name)
 
     def build(self):
+        if self.resource.tick_dispatch not in self.tick_dispatch_modes:
+            raise ValueError(f'Invalid tick dispatch mode "{self.resource.tick_dispatch}"')
+        if self.resource.method_guard not in self.method_guard_modes:
+            raise ValueError(f'Invalid method guard mode "{self.resource.method_guard}"')
+
         self.description = (f'{self.resource.description}\n\n'
                             f'Version {self.resource.version}\n'
                             f'By {self.resource.author}')
@@ -57,10 +142,46 @@ class ProjectBuilder(ResourceBuilder):
         for component in self.resource.components:
             self.delegate(ComponentBuilder, component.name, component)
 
+        if self.tick_counters.periods or self.tick_counters.shard_counts:
+            self.tick_counters.build(self)
+
+        if self.tick_dispatcher.components:
+            self.tick_dispatcher.build(self)
+
+        if self.resource.method_guard == 'auto':
+            self.guard_recursive_methods()
+
+    def guard_recursive_methods(self):
+        """Add a recursion guard to the methods that can invoke themselves."""
+        recursive = recursive_functions(call_graph(self))
+
+        for component_builder in self:
+            for builder in component_builder:
+                if (isinstance(builder, ComponentMethodBuilder)
+                        and builder.resource.function_name in recursive):
+                    builder.guard_recursion()
+
     def create_data_pack(self):
         return DataPack(self.name, self.description)
 
     def generate_function(self, commands):
-        function_name = next(self.function_names)
-        self.delegate(FunctionBuilder, function_name, commands)
-        return function_name
+        with FunctionBuilder(self, None, commands).current() as builder:
+            builder.build()
+        return builder.name
+
+    def generated_function_name(self, body):
+        """Return the name of a generated function derived from its body.
+
+        The second value is `True` if a function with the same body was
+        already generated. Names only depend on the content of the
+        functions, so they don't change when unrelated functions are added
+        or removed.
+        """
+        digest = sha1(body.encode()).hexdigest()
+        function_name = f'{self.name}:generated/{digest[:16]}'
+
+        previous = self.generated_functions.setdefault(function_name, digest)
+        if previous != digest:
+            raise ValueError(f'Hash collision for generated function "{function_name}"')
+
+        return function_name, previous is not digest
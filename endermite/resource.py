@@ -1,16 +1,24 @@
 __all__ = ['AutoRegisteringResourceClass', 'ResourceBuilder', 'clear_registries']
 
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from collections import defaultdict
 
 from .error import build_guard
+from .profiler import BuildProfiler
 from .utils import underscore
 
 
-def clear_registries():
-    """Clear all the resource registries."""
+def clear_registries(*packages):
+    """Clear the resource registries, optionally only for the given packages."""
     for registry in AutoRegisteringResourceClass.registries:
-        registry.clear()
+        if not packages:
+            registry.clear()
+            continue
+
+        for resources in registry.values():
+            for name, resource in list(resources.items()):
+                if resource.__module__.partition('.')[0] in packages:
+                    del resources[name]
 
 
 class AutoRegisteringResourceClass:
@@ -66,17 +74,28 @@ class ResourceBuilder(list):
             self.ctx = defaultdict(lambda: None)
 
     def __getattr__(self, name):
-        if self.parent is not None:
-            return getattr(self.parent, name)
-        raise AttributeError(name)
+        """Resolve the attribute on the parent and cache it on the instance.
+
+        Every builder of the chain caches the attribute on the way back, so
+        lookups are constant-time once resolved. This means that builders
+        must define the attributes they share with their children before
+        creating them.
+        """
+        if self.parent is None:
+            raise AttributeError(name)
+        value = getattr(self.parent, name)
+        self.__dict__[name] = value
+        return value
 
     @contextmanager
     def current(self):
         """Temporarily set the instance as the current builder of its type."""
         previous = self.ctx[self.__class__]
         self.ctx[self.__class__] = self
+        profiler = self.ctx[BuildProfiler]
         try:
-            with build_guard(f'{self.guard_name} "{self.name}"'):
+            with build_guard(f'{self.guard_name} "{self.name}"'), \
+                    (profiler.measure(self) if profiler else nullcontext()):
                 yield self
         finally:
             self.ctx[self.__class__] = previous
@@ -89,10 +108,24 @@ class ResourceBuilder(list):
         with builder_class(self, name, resource).current() as builder:
             builder.build()
 
+    def detach(self):
+        """Remove the builder from its parent while keeping its children."""
+        parent = self.parent
+        index = next(i for i, child in enumerate(parent) if child is self)
+        parent[index:index + 1] = list(self)
+
+        for child in self:
+            child.parent = parent
+
     def populate(self, pack):
         """Populate the data pack with what was built from the resource."""
         for builder in self:
             builder.populate(pack)
 
+    def flush(self, sink):
+        """Write what was built from the resource to a data pack sink."""
+        for builder in self:
+            builder.flush(sink)
+
     def __repr__(self):
         return f'{self.__class__.__name__}({self.name!r}, {super().__repr__()})'
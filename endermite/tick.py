@@ -0,0 +1,100 @@
+__all__ = ['TickDispatcher', 'TickCounters', 'shard_objective']
+
+from .function import FunctionBuilder, FunctionTagBuilder
+
+
+def shard_objective(shards):
+    """Return the objective holding the shard of the entities for a shard count.
+
+    The objective is shared by every component with the same number of
+    shards, so the score of an entity stays valid after detaching one
+    of its sharded components.
+    """
+    return f'endermite.s{shards}'
+
+
+class TickDispatcher:
+    """Run the tick callbacks of every component with a single `@e` scan.
+
+    Entities with at least one ticking component get the dispatch tag.
+    Each tick, the dispatcher runs as every entity with the tag and
+    invokes the tick callbacks of the components they have.
+    """
+
+    def __init__(self, name):
+        self.tag = f'{name}.component'
+        self.function = f'{name}:tick/dispatch'
+        self.refresh_function = f'{name}:tick/refresh'
+        self.components = []
+
+    def build(self, project_builder):
+        project_builder.delegate(FunctionBuilder, self.function, [
+            f'execute {condition}if entity @s[tag={component_tag}] run function #{callback}'
+            for component_tag, callbacks in self.components
+            for condition, callback in callbacks
+        ])
+
+        project_builder.delegate(FunctionBuilder, self.refresh_function, [
+            f'tag @s remove {self.tag}',
+            *(f'execute if entity @s[tag={component_tag}] run tag @s add {self.tag}'
+              for component_tag, _ in self.components),
+        ])
+
+        func = project_builder.generate_function([
+            f'execute as @e[tag={self.tag}] run function {self.function}'
+        ])
+        project_builder.delegate(FunctionTagBuilder, 'minecraft:tick', [func])
+
+
+class TickCounters:
+    """Count the ticks of every period used by slow ticks and sharded components.
+
+    Each period has its own counter that goes from 0 to the period minus
+    one and wraps around. The tick methods that don't run every tick are
+    only invoked when the counter matches their offset, and sharded
+    components use the counter of their shard count to select the shard
+    processed during the current tick. The load function also creates the
+    objectives holding the shards of the entities.
+    """
+
+    objective = 'endermite.tick'
+
+    def __init__(self, name):
+        self.name = name
+        self.periods = set()
+        self.shard_counts = set()
+        self.counters_function = f'{name}:tick/counters'
+        self.load_function = f'{name}:tick/load'
+
+    def score(self, every):
+        """Return the fake player and the objective of the tick counter of a period."""
+        return f'#{self.name}.{every} {self.objective}'
+
+    def shard_assignment(self, shards):
+        """Return the commands assigning the next shard to the current entity."""
+        objective = shard_objective(shards)
+        counter = f'#{self.name} {objective}'
+        return [
+            f'scoreboard players operation @s {objective} = {counter}',
+            f'scoreboard players add {counter} 1',
+            f'execute if score {counter} matches {shards}.. run scoreboard players set {counter} 0',
+        ]
+
+    def build(self, project_builder):
+        project_builder.delegate(FunctionBuilder, self.load_function, [
+            f'scoreboard objectives add {self.objective} dummy',
+            *(f'scoreboard objectives add {shard_objective(shards)} dummy'
+              for shards in sorted(self.shard_counts)),
+        ])
+        project_builder.delegate(FunctionTagBuilder, 'minecraft:load', [self.load_function])
+
+        commands = []
+        for every in sorted(self.periods):
+            score = self.score(every)
+            commands += [
+                f'scoreboard players add {score} 1',
+                f'execute if score {score} matches {every}.. run scoreboard players set {score} 0',
+            ]
+
+        project_builder.delegate(FunctionBuilder, self.counters_function, commands)
+        project_builder.delegate(FunctionTagBuilder, 'minecraft:tick', [self.counters_function])
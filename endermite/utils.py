@@ -1,9 +1,17 @@
-__all__ = ['underscore', 'import_submodules', 'delete_cache']
+__all__ = [
+    'underscore',
+    'import_submodules',
+    'delete_cache',
+    'discard_modules',
+    'parse_imports',
+]
 
 import sys
 import re
-from itertools import count
+import ast
+from pathlib import Path
 from importlib import import_module
+from importlib.util import resolve_name
 from importlib.resources import contents, is_resource
 
 
@@ -21,11 +29,6 @@ def underscore(string):
     return result.lower()
 
 
-def name_generator(string):
-    for i in count():
-        yield string.format(name=f'{i:#08x}'[2:])
-
-
 # Module
 
 
@@ -58,3 +61,42 @@ def delete_cache(package):
                if mod == package or mod.startswith(package + '.')]
     for mod in modules:
         del sys.modules[mod]
+
+
+def discard_modules(path):
+    """Remove all the modules loaded from a given directory from the module cache."""
+    path = Path(path).absolute()
+    modules = [name for name, mod in sys.modules.items()
+               if path in Path(getattr(mod, '__file__', None) or '/').absolute().parents]
+    for mod in modules:
+        del sys.modules[mod]
+
+
+def parse_imports(path, package=None):
+    """Return the names of the modules imported by a source file.
+
+    Names imported with `from ... import` are included as well, because
+    they can refer to submodules. Relative imports are resolved against
+    the given package and skipped when there's none.
+    """
+    try:
+        tree = ast.parse(Path(path).read_bytes(), str(path))
+    except (SyntaxError, ValueError, OSError):
+        return set()
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                parts = alias.name.split('.')
+                names.update('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level and not package:
+                continue
+            try:
+                base = resolve_name('.' * node.level + (node.module or ''), package)
+            except (ImportError, ValueError):
+                continue
+            names.add(base)
+            names.update(f'{base}.{alias.name}' for alias in node.names)
+    return names
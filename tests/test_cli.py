@@ -1,10 +1,30 @@
+import re
+import sys
+import json
+import shutil
+import socket
+import threading
+import subprocess
+import zipfile
+from pathlib import Path
 from importlib.resources import read_binary
 import pytest
+import click
 from click.testing import CliRunner
 
 import endermite
+from endermite.resource import clear_registries
+from endermite.utils import delete_cache
 from endermite.cli import ender
-from endermite.cli.config import ENDERMITE_FOLDER_PATH, LEVEL_DATA_PATH
+from endermite.cli.config import (
+    ENDERMITE_FOLDER_PATH,
+    LEVEL_DATA_PATH,
+    DATAPACKS_FOLDER_PATH,
+    SERVER_SOCKET_PATH,
+)
+from endermite.cli.graph import DependencyGraph
+from endermite.cli.serve import BuildServer
+from endermite.cli.watch import WATCHER_BACKENDS, Change, merge_changes
 
 
 @pytest.fixture
@@ -51,3 +71,734 @@ class TestInitCommand:
 
             project_path = ENDERMITE_FOLDER_PATH / 'something'
             assert project_path.is_dir()
+
+
+PROJECT_FILES = {
+    'shared/__init__.py': """
+from endermite import Component
+from endermite.decorators import public
+
+
+class Greeter(Component, abstract=True):
+    @public
+    def greet(self):
+        self.say('Hello')
+""",
+    'tutorial/__init__.py': """
+from endermite import Project, find_resources
+
+tutorial = Project(name='tutorial', **find_resources(__name__))
+""",
+    'tutorial/hello.py': """
+from endermite.decorators import public, tick
+from shared import Greeter
+
+
+class Hello(Greeter):
+    @tick
+    @public
+    def say_hello(self):
+        self.greet()
+""",
+    'other.py': """
+import os
+""",
+}
+
+
+@pytest.fixture
+def world(runner):
+    with runner.isolated_filesystem():
+        LEVEL_DATA_PATH.write_bytes(read_binary('tests.files', 'level.dat'))
+        for filename, content in PROJECT_FILES.items():
+            path = ENDERMITE_FOLDER_PATH / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+        source_path = ENDERMITE_FOLDER_PATH.absolute()
+        yield source_path
+
+        while str(source_path) in sys.path:
+            sys.path.remove(str(source_path))
+        for name in ('shared', 'tutorial', 'other'):
+            delete_cache(name)
+        clear_registries()
+
+
+class TestBuildCommand:
+    def test_command_result(self, runner, world):
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert 'Done!' in result.output
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        assert (functions / 'component' / 'hello' / 'say_hello.mcfunction').is_file()
+
+    def test_parallel_build(self, runner, world):
+        (world / 'broken.py').write_text('raise ValueError("broken project")\n')
+
+        result = runner.invoke(ender, ['build', '--jobs', '2'])
+        assert result.exit_code == 1
+        assert 'Couldn\'t build module "broken"' in result.output
+        assert 'ValueError: broken project' in result.output
+        assert 'Done!' in result.output
+
+    def test_profile(self, runner, world):
+        result = runner.invoke(ender, ['build', '--profile-output', 'profile'])
+        assert result.exit_code == 0
+        assert 'component "hello"' in result.output
+        assert 'component method "say_hello"' in result.output
+
+        report = json.loads(Path('profile', 'tutorial.json').read_text())
+        assert set(report['phases']) == {'import', 'build', 'populate', 'dump'}
+        assert report['tree']['functions'] == 12
+
+    def test_analyze(self, runner, world):
+        result = runner.invoke(ender, ['build', '--analyze'])
+        assert result.exit_code == 0
+        assert 'Each tick runs 1 commands and 1 @e scans' in result.output
+        assert 'tick "hello" minecraft:tick' in result.output
+        assert 'method "hello" say_hello' in result.output
+
+    def test_shared_tick_dispatch(self, runner, world):
+        init_path = world / 'tutorial' / '__init__.py'
+        init_path.write_text(init_path.read_text().replace(
+            "name='tutorial',", "name='tutorial', tick_dispatch='shared',"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        data = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data'
+        dispatch = data / 'tutorial' / 'functions' / 'tick' / 'dispatch.mcfunction'
+        assert 'if entity @s[tag=tutorial.component.hello]' in dispatch.read_text()
+
+        tick_tag = json.loads((data / 'minecraft' / 'tags' / 'functions' / 'tick.json').read_text())
+        assert len(tick_tag['values']) == 1
+
+    def test_analyze_shared_tick_dispatch(self, runner, world):
+        init_path = world / 'tutorial' / '__init__.py'
+        init_path.write_text(init_path.read_text().replace(
+            "name='tutorial',", "name='tutorial', tick_dispatch='shared',"
+        ))
+
+        result = runner.invoke(ender, ['build', '--analyze'])
+        assert result.exit_code == 0
+
+        line = next(line for line in result.output.splitlines()
+                    if line.endswith('tick "hello" tutorial:tick/dispatch'))
+        _, _, _, entity_commands, _ = map(int, line.split()[:5])
+        assert entity_commands > 1
+
+    def test_tick_rate(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace('@tick', '@tick(every=20, offset=5)'))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        data = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data'
+        counters = (data / 'tutorial' / 'functions' / 'tick' / 'counters.mcfunction').read_text()
+        assert 'scoreboard players add #tutorial.20 endermite.tick 1' in counters
+
+        callback = data / 'tutorial' / 'tags' / 'functions' / 'component' / 'callback' / 'tick'
+        assert (callback / 'hello' / 'every_20_5.json').is_file()
+
+        tick_tag = json.loads((data / 'minecraft' / 'tags' / 'functions' / 'tick.json').read_text())
+        assert 'tutorial:tick/counters' in tick_tag['values']
+
+    def test_tick_shards(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace('(Greeter)', '(Greeter, shards=4)'))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        load = (functions / 'tick' / 'load.mcfunction').read_text()
+        assert 'scoreboard objectives add endermite.s4 dummy' in load
+
+        generated = [path.read_text() for path in (functions / 'generated').iterdir()]
+        assert any('scoreboard players operation @s endermite.s4 = #tutorial endermite.s4' in body
+                   for body in generated)
+        assert any('if score #tutorial.4 endermite.tick matches 3 '
+                   'as @e[tag=tutorial.component.hello,scores={endermite.s4=3}]' in body
+                   for body in generated)
+
+    def test_entity_types(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace(
+            '(Greeter)', "(Greeter, entity_types=['zombie', 'husk'])"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        data = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial'
+        tag_path = data / 'tags' / 'entity_types' / 'component' / 'hello.json'
+        assert json.loads(tag_path.read_text())['values'] == ['minecraft:zombie', 'minecraft:husk']
+
+        attach = (data / 'functions' / 'attach' / 'hello.mcfunction').read_text()
+        assert 'if entity @s[type=#tutorial:component/hello] run function' in attach
+        assert 'can only be attached to minecraft:zombie, minecraft:husk' in attach
+
+        generated = [path.read_text() for path in (data / 'functions' / 'generated').iterdir()]
+        assert any('as @e[tag=tutorial.component.hello,type=#tutorial:component/hello]' in body
+                   for body in generated)
+
+    def test_switch(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace(
+            'self.greet()',
+            "self.switch(('@s', 'state'), {i: lambda self, i=i: self.say(f'case {i}') "
+            "for i in range(8)}, default=lambda self: self.say('unknown'))"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        bodies = [path.read_text() for path in (functions / 'generated').iterdir()]
+        bodies.append((functions / 'component' / 'hello' / 'say_hello.mcfunction').read_text())
+        assert any('scoreboard players operation #switch.' in body for body in bodies)
+        assert any(' matches ..3 run function' in body for body in bodies)
+        assert any(' matches ..-1 run function' in body for body in bodies)
+        assert max(len(re.findall(' matches .* run function', body)) for body in bodies) <= 2
+
+    def test_switch_multiple_entities(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace(
+            'self.greet()',
+            "self.execute(('as', '@e[type=zombie]')).switch("
+            "('@s', 'state'), {1: lambda self: self.say('one'), 2: lambda self: self.say('two')})"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        bodies = [path.read_text() for path in functions.glob('**/*.mcfunction')]
+        zombie_commands = [line for body in bodies for line in body.splitlines()
+                           if 'as @e[type=zombie]' in line]
+        assert len(zombie_commands) == 1
+        assert re.search(r'as @e\[type=zombie\] run function \S+$', zombie_commands[0])
+
+        dispatch = next(body for body in bodies if 'scoreboard players reset #switch.' in body)
+        assert 'as @e[type=zombie]' not in dispatch
+        assert 'scoreboard players operation #switch.' in dispatch
+        assert dispatch.count(' run function ') == 2
+
+    def test_instrument(self, runner, world):
+        result = runner.invoke(ender, ['build', '--instrument'])
+        assert result.exit_code == 0
+        assert '/function tutorial:profile/report' in result.output
+
+        data = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data'
+        functions = data / 'tutorial' / 'functions'
+        say_hello = functions / 'component' / 'hello' / 'say_hello.mcfunction'
+        assert 'scoreboard players add #tutorial.' in say_hello.read_text()
+        assert all('endermite.calls 1' in path.read_text()
+                   for path in (functions / 'generated').iterdir()
+                   if 'tellraw' not in path.read_text())
+
+        report = (functions / 'profile' / 'report.mcfunction').read_text()
+        assert report.count('function tutorial:profile/top') == 10
+        assert (functions / 'profile' / 'reset.mcfunction').exists()
+        tick_tag = data / 'minecraft' / 'tags' / 'functions' / 'tick.json'
+        assert 'tutorial:profile/tick' in json.loads(tick_tag.read_text())['values']
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert 'cached' in result.output
+        assert not (functions / 'profile').exists()
+        assert 'endermite.calls' not in say_hello.read_text()
+
+    def test_execute_clause_values(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace(
+            'self.greet()',
+            "self.execute(('if', 'data', 'entity', '@s', {'Tags': ['x']})).say('dict')\n"
+            "        self.execute(('if', 'score', '@s', 'a', 'matches', 1)).say('int')\n"
+            "        self.execute(('if', 'score', '@s', 'a', 'matches', True)).say('bool')"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        bodies = '\n'.join(path.read_text() for path in functions.glob('**/*.mcfunction'))
+        assert "if data entity @s {'Tags': ['x']} run say dict" in bodies
+        assert 'matches 1 run say int' in bodies
+        assert 'matches True run say bool' in bodies
+
+    def test_method_guard(self, runner, world):
+        init_path = world / 'tutorial' / '__init__.py'
+        init_path.write_text(init_path.read_text().replace(
+            "name='tutorial',", "name='tutorial', method_guard='auto',"
+        ))
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text() + (
+            '\n'
+            '    @public\n'
+            '    def recurse(self):\n'
+            '        self.recurse()\n'
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        say_hello = (functions / 'component' / 'hello' / 'say_hello.mcfunction').read_text()
+        recurse = (functions / 'component' / 'hello' / 'recurse.mcfunction').read_text()
+        assert 'tag=' not in say_hello
+        assert 'Recursive method invocation' in recurse
+        assert '@e[tag=' not in recurse
+
+    def test_entity_method_guard_nested_context(self, runner, world):
+        init_path = world / 'tutorial' / '__init__.py'
+        init_path.write_text(init_path.read_text().replace(
+            "name='tutorial',", "name='tutorial', method_guard='entity',"
+        ))
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text() + (
+            '\n'
+            '    @public\n'
+            '    def nested(self):\n'
+            "        with self.execute(('at', '@s')):\n"
+            "            self.say('nested')\n"
+            "            self.say('twice')\n"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        bodies = [path.read_text() for path in (functions / 'generated').iterdir()]
+        nested = next(body for body in bodies if 'say nested' in body)
+        selector = '@e[tag=tutorial.component.hello.nested.guard]'
+        assert f'as {selector} run say nested\nexecute as {selector} run say twice' in nested
+        assert 'unless entity' not in nested
+
+    def test_auto_method_guard_nested_context(self, runner, world):
+        init_path = world / 'tutorial' / '__init__.py'
+        init_path.write_text(init_path.read_text().replace(
+            "name='tutorial',", "name='tutorial', method_guard='auto',"
+        ))
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text() + (
+            '\n'
+            '    @public\n'
+            '    def nested(self):\n'
+            "        with self.execute(('as', '@p')):\n"
+            "            self.add_tag('y')\n"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        method = (functions / 'component' / 'hello' / 'nested.mcfunction').read_text()
+        tag = 'tutorial.component.hello.nested.guard'
+        assert f'tag @s add {tag}' in method
+        assert f'tag @s remove {tag}' in method
+
+        bodies = [path.read_text() for path in (functions / 'generated').iterdir()]
+        assert any(f'execute as @e[tag={tag}] run tag @s add y' in body for body in bodies)
+
+        say_hello = (functions / 'component' / 'hello' / 'say_hello.mcfunction').read_text()
+        assert 'tag @s add' not in say_hello
+
+    def test_shared_method_body(self, runner, world):
+        (world / 'tutorial' / 'bye.py').write_text(
+            'from endermite.decorators import public\n'
+            'from shared import Greeter\n'
+            '\n'
+            '\n'
+            'class Bye(Greeter):\n'
+            '    @public\n'
+            '    def say_bye(self):\n'
+            '        self.greet()\n'
+        )
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        component = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions' / 'component'
+        hello = (component / 'hello' / 'greeter' / 'greet.mcfunction').read_text()
+        bye = (component / 'bye' / 'greeter' / 'greet.mcfunction').read_text()
+        assert (hello.strip().endswith('function tutorial:component/bye/greeter/greet')
+                != bye.strip().endswith('function tutorial:component/hello/greeter/greet'))
+
+    def test_shared_method_body_nested_context(self, runner, world):
+        shared_path = world / 'shared' / '__init__.py'
+        shared_path.write_text(shared_path.read_text().replace(
+            "self.say('Hello')",
+            "with self.execute(('at', '@s')):\n"
+            "            self.say('Hello')\n"
+            "            self.say('again')"
+        ))
+        (world / 'tutorial' / 'bye.py').write_text(
+            'from shared import Greeter\n'
+            '\n'
+            '\n'
+            'class Bye(Greeter):\n'
+            '    pass\n'
+        )
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        component = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions' / 'component'
+        hello = (component / 'hello' / 'greeter' / 'greet.mcfunction').read_text()
+        bye = (component / 'bye' / 'greeter' / 'greet.mcfunction').read_text()
+        assert (hello.strip().endswith('function tutorial:component/bye/greeter/greet')
+                != bye.strip().endswith('function tutorial:component/hello/greeter/greet'))
+        assert 'shared.component.greeter.greet.guard' in hello + bye
+
+    def test_shared_method_body_entity_types(self, runner, world):
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace(
+            '(Greeter)', "(Greeter, entity_types='zombie')"
+        ))
+        (world / 'tutorial' / 'bye.py').write_text(
+            'from shared import Greeter\n'
+            '\n'
+            '\n'
+            "class Bye(Greeter, entity_types='skeleton'):\n"
+            '    pass\n'
+        )
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        component = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions' / 'component'
+        hello = (component / 'hello' / 'greeter' / 'greet.mcfunction').read_text()
+        bye = (component / 'bye' / 'greeter' / 'greet.mcfunction').read_text()
+        assert 'type=minecraft:zombie' in hello and 'component/bye' not in hello
+        assert 'type=minecraft:skeleton' in bye and 'component/hello' not in bye
+
+    @pytest.mark.parametrize('option', ['optimize', 'flatten_execute'])
+    def test_fewer_generated_functions(self, runner, world, option):
+        runner.invoke(ender, ['build'])
+        generated = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions' / 'generated'
+        unoptimized = {path.name for path in generated.iterdir()}
+
+        init_path = world / 'tutorial' / '__init__.py'
+        init_path.write_text(init_path.read_text().replace(
+            "name='tutorial',", f"name='tutorial', {option}=True,"
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        optimized = {path.name for path in generated.iterdir()}
+        assert len(optimized) < len(unoptimized)
+
+        assert any('run say Hello' in (generated / name).read_text() for name in optimized)
+
+    def test_modified_files(self, runner, world):
+        runner.invoke(ender, ['build'])
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        say_hello = functions / 'component' / 'hello' / 'say_hello.mcfunction'
+        expected = say_hello.read_text()
+        say_hello.write_text(expected.replace('function', 'fnuction'))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert '1 file changed' in result.output
+        assert say_hello.read_text() == expected
+
+    def test_stream(self, runner, world):
+        pack_path = DATAPACKS_FOLDER_PATH / 'tutorial'
+
+        def read_pack():
+            return {str(path.relative_to(pack_path)): path.read_bytes()
+                    for path in pack_path.rglob('*') if path.is_file()}
+
+        runner.invoke(ender, ['build'])
+        expected = read_pack()
+        shutil.rmtree(pack_path)
+
+        result = runner.invoke(ender, ['build', '--stream'])
+        assert result.exit_code == 0
+        assert read_pack() == expected
+
+    def test_zip(self, runner, world):
+        pack_path = DATAPACKS_FOLDER_PATH / 'tutorial'
+        archive_path = DATAPACKS_FOLDER_PATH / 'tutorial.zip'
+
+        runner.invoke(ender, ['build'])
+        expected = {str(path.relative_to(pack_path)): path.read_bytes()
+                    for path in pack_path.rglob('*') if path.is_file()}
+        del expected['.endermite-manifest.json']
+
+        result = runner.invoke(ender, ['build', '--zip'])
+        assert result.exit_code == 0
+        assert not pack_path.exists()
+
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == sorted(expected)
+            assert {name: archive.read(name) for name in archive.namelist()} == expected
+
+        content = archive_path.read_bytes()
+        archive_path.unlink()
+
+        result = runner.invoke(ender, ['build', '--zip', '--stream'])
+        assert result.exit_code == 0
+        assert archive_path.read_bytes() == content
+
+        result = runner.invoke(ender, ['build', '--zip'])
+        assert '0 files changed' in result.output
+
+    def test_build_cache(self, runner, world):
+        bye_path = world / 'tutorial' / 'bye.py'
+        bye_path.write_text(
+            'from endermite.decorators import public\n'
+            'from shared import Greeter\n'
+            '\n'
+            '\n'
+            'class Bye(Greeter):\n'
+            '    @public\n'
+            '    def say_bye(self):\n'
+            '        self.greet()\n'
+        )
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert 'cached' not in result.output
+
+        bye_path.write_text(bye_path.read_text().replace('self.greet()', 'self.say("Bye")'))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert '1 cached component' in result.output
+
+        result = runner.invoke(ender, ['build', '--no-cache'])
+        assert result.exit_code == 0
+        assert '0 files changed' in result.output
+
+        bye_path.unlink()
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        result = runner.invoke(ender, ['build', '--no-cache'])
+        assert result.exit_code == 0
+        assert '0 files changed' in result.output
+
+    def test_build_cache_indirect_import(self, runner, world):
+        (world / 'tutorial' / 'constants.py').write_text("WORD = 'hello'\n")
+        (world / 'tutorial' / 'helpers.py').write_text(
+            'from tutorial.constants import WORD\n'
+            '\n'
+            '\n'
+            'def word():\n'
+            '    return WORD\n'
+        )
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text('from tutorial.helpers import word\n' + hello_path.read_text().replace(
+            'self.greet()', 'self.say(word())'
+        ))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        (world / 'tutorial' / 'constants.py').write_text("WORD = 'goodbye'\n")
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert 'cached' not in result.output
+
+        functions = DATAPACKS_FOLDER_PATH / 'tutorial' / 'data' / 'tutorial' / 'functions'
+        bodies = '\n'.join(path.read_text() for path in functions.glob('**/*.mcfunction'))
+        assert 'say goodbye' in bodies and 'say hello' not in bodies
+
+    def test_unchanged_files(self, runner, world):
+        runner.invoke(ender, ['build'])
+        pack_path = DATAPACKS_FOLDER_PATH / 'tutorial'
+        stale_path = pack_path / 'data' / 'tutorial' / 'functions' / 'stale.mcfunction'
+        stale_path.write_text('say stale')
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+        assert '0 files changed' in result.output
+        assert stale_path.is_file()
+
+        functions_path = stale_path.parent
+
+        def read_functions():
+            return {path.relative_to(functions_path).as_posix(): path.read_bytes()
+                    for path in functions_path.rglob('*.mcfunction')}
+
+        previous = read_functions()
+
+        hello_path = world / 'tutorial' / 'hello.py'
+        hello_path.write_text(hello_path.read_text().replace('self.greet()', 'self.say(1)'))
+
+        result = runner.invoke(ender, ['build'])
+        assert result.exit_code == 0
+
+        current = read_functions()
+        changed = {name for name in previous.keys() | current.keys()
+                   if previous.get(name) != current.get(name)}
+
+        assert f'{len(changed)} files changed' in result.output
+        assert all(name.startswith('generated/') or name == 'component/hello/say_hello.mcfunction'
+                   for name in changed)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='requires unix sockets')
+class TestBuildServer:
+    def test_client(self, runner, world):
+        sys.path.append(str(world))
+
+        with BuildServer(world, DATAPACKS_FOLDER_PATH.absolute()) as server, \
+                socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(SERVER_SOCKET_PATH))
+            listener.listen()
+            listener.settimeout(10)
+
+            def handle_requests(count):
+                for _ in range(count):
+                    connection, _ = listener.accept()
+                    with connection:
+                        server.handle(connection)
+
+            thread = threading.Thread(target=handle_requests, args=(3,))
+            thread.start()
+
+            result = runner.invoke(ender, ['client'])
+            assert result.exit_code == 0
+            assert 'Done!' in result.output
+
+            hello_path = world / 'tutorial' / 'hello.py'
+            hello_path.write_text(hello_path.read_text().replace('self.greet()', 'self.say(1)'))
+
+            result = runner.invoke(ender, ['client', 'tutorial'])
+            assert result.exit_code == 0
+            assert 'Done!' in result.output
+            assert '0 files changed' not in result.output
+
+            result = runner.invoke(ender, ['client', 'missing'])
+            assert result.exit_code == 1
+
+            thread.join()
+
+    def test_failed_request(self, runner, world):
+        with BuildServer(world, DATAPACKS_FOLDER_PATH.absolute()) as server, \
+                socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(SERVER_SOCKET_PATH))
+            listener.listen()
+            listener.settimeout(10)
+
+            def fail(*_):
+                raise RuntimeError('unexpected failure')
+
+            def handle_requests():
+                connection, _ = listener.accept()
+                with connection:
+                    server.handle(connection)
+                connection, _ = listener.accept()
+                with connection:
+                    connection.recv(4096)
+                    connection.sendall(b'not json\n')
+
+            server.build = fail
+            thread = threading.Thread(target=handle_requests)
+            thread.start()
+
+            result = runner.invoke(ender, ['client'])
+            assert result.exit_code == 1
+            assert 'unexpected failure' in result.output
+
+            result = runner.invoke(ender, ['client'])
+            assert result.exit_code == 1
+            assert 'invalid response' in result.output
+
+            thread.join()
+
+    def test_no_server(self, runner, world):
+        result = runner.invoke(ender, ['client'])
+        assert result.exit_code == 1
+        assert 'ender serve' in result.output
+
+
+class TestStartup:
+    HEAVY_MODULES = {'nbtlib', 'mcpack', 'endermite.project', 'endermite.cli.build'}
+    IMPORT_TIME_BUDGET = 0.25
+
+    @pytest.mark.parametrize('arguments', [['--version'], ['--help']])
+    def test_import_time(self, arguments):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'endermite', *arguments],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+        )
+
+        cumulative_times = {}
+        for line in process.stderr.splitlines():
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                cumulative_times[name.strip()] = int(cumulative) / 1e6
+
+        assert not self.HEAVY_MODULES & cumulative_times.keys()
+        assert cumulative_times['endermite.cli'] < self.IMPORT_TIME_BUDGET
+
+    def test_lazy_help(self):
+        ctx = click.Context(ender)
+        for name, (_, help_text) in ender.lazy_commands.items():
+            command = ender.get_command(ctx, name)
+            assert command.help.strip().splitlines()[0] == help_text
+
+
+class TestBenchCommand:
+    def test_baseline(self, runner):
+        with runner.isolated_filesystem():
+            arguments = ['bench', '--components', '2', '--methods', '2', '--repeat', '1']
+
+            result = runner.invoke(ender, arguments + ['--save', 'baseline.json'])
+            assert result.exit_code == 0
+
+            baseline = json.loads(Path('baseline.json').read_text())
+            assert baseline['result']['commands'] > 0
+            assert baseline['result']['files'] > 0
+
+            result = runner.invoke(ender, arguments + ['--compare', 'baseline.json',
+                                                       '--tolerance', '100'])
+            assert result.exit_code == 0
+            assert '+0.0%' in result.output
+
+            result = runner.invoke(ender, ['bench', '--compare', 'baseline.json'])
+            assert result.exit_code == 1
+
+
+class TestDependencyGraph:
+    def test_invalidate(self, world):
+        graph = DependencyGraph(world)
+        all_files = [path for path in world.rglob('*') if path.is_file()]
+        assert graph.invalidate(all_files) == {'shared', 'tutorial', 'other'}
+
+        assert graph.invalidate([world / 'other.py']) == {'other'}
+        assert graph.invalidate([world / 'tutorial' / 'hello.py']) == {'tutorial'}
+        assert graph.invalidate([world / 'shared' / '__init__.py']) == {'shared', 'tutorial'}
+
+
+@pytest.mark.parametrize('backend', WATCHER_BACKENDS)
+def test_watcher_backend(tmp_path, backend):
+    try:
+        watcher = backend(tmp_path)
+    except OSError:
+        pytest.skip(f'{backend.__name__} is not available')
+
+    with watcher:
+        (tmp_path / 'existing.py').write_text('')
+        assert watcher.wait_for_changes(0) == [Change('created', str(tmp_path / 'existing.py'))]
+
+        (tmp_path / 'package').mkdir()
+        (tmp_path / 'package' / 'module.py').write_text('')
+        (tmp_path / 'existing.py').unlink()
+
+        changes = merge_changes(watcher.wait_for_changes(0.1) + watcher.wait_for_changes(0.1))
+        assert sorted(changes) == [
+            Change('created', str(tmp_path / 'package' / 'module.py')),
+            Change('removed', str(tmp_path / 'existing.py')),
+        ]
@@ -1,5 +1,24 @@
+import pytest
+
 import endermite
+from endermite.resource import ResourceBuilder
 
 
 def test_version():
     assert endermite.__version__ == '0.0.7'
+
+
+def test_builder_attribute_lookup():
+    root = ResourceBuilder(None, 'root', None)
+    root.shared = 'value'
+
+    builder = root
+    for i in range(100):
+        builder = ResourceBuilder(builder, f'child{i}', None)
+
+    assert builder.shared == 'value'
+    assert builder.__dict__['shared'] == 'value'
+    assert builder.parent.__dict__['shared'] == 'value'
+
+    with pytest.raises(AttributeError):
+        builder.missing  # pylint: disable = pointless-statement